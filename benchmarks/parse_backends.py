@@ -0,0 +1,107 @@
+"""
+Сравнение движков разбора HTML на записанных страницах выдачи.
+
+Записать страницу:
+    python -m benchmarks.parse_backends record avito "https://www.avito.ru/moskva/avtomobili/s_probegom/bmw?cd=1&s=104"
+    python -m benchmarks.parse_backends record drom "https://www.drom.ru/my_region/?go=..."
+
+Страницы сохраняются в benchmarks/fixtures/<platform>/; там уже лежат небольшие sample.html
+с разметкой, которую читают парсеры, чтобы замер повторялся без записи. Запуск по всем страницам:
+    python -m benchmarks.parse_backends run [--repeat 20]
+
+Каждая строка замера — одна и та же работа: разбор страницы и извлечение объявлений.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from pathlib import Path
+
+from services.avito_parser import AvitoParser
+from services.drom_parser import DromParser
+from services.html_backend import available_backends
+from services.http_client import http_client
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+PARSERS = {
+    "avito": AvitoParser,
+    "drom": DromParser
+}
+
+
+async def record(platform: str, url: str):
+    parser = PARSERS[platform]()
+    try:
+        html = await parser.fetch_html(url)
+    finally:
+        await http_client.close()
+    if not html:
+        print("Страница не загружена")
+        return
+
+    target_dir = FIXTURES_DIR / platform
+    target_dir.mkdir(parents=True, exist_ok=True)
+    path = target_dir / f"{int(time.time())}.html"
+    path.write_text(html, encoding="utf-8")
+    print(f"Сохранено: {path} ({len(html) // 1024} КБ)")
+
+
+def measure(func, repeat: int) -> float:
+    """Медиана времени вызова, мс"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def run(repeat: int):
+    backends = list(available_backends())
+    fixtures = sorted(FIXTURES_DIR.glob("*/*.html"))
+    if not fixtures:
+        print(f"Нет записанных страниц в {FIXTURES_DIR}, сначала выполните record")
+        return
+
+    print(f"Движки: {', '.join(backends)}; повторов: {repeat}\n")
+    for path in fixtures:
+        platform = path.parent.name
+        if platform not in PARSERS:
+            continue
+        html = path.read_text(encoding="utf-8")
+        parser = PARSERS[platform]()
+        print(f"{platform}/{path.name} ({len(html) // 1024} КБ)")
+
+        # Как было раньше: полное дерево html.parser, извлечение то же
+        ads = parser._parse_html(html, backend="html.parser", only=None)
+        baseline = measure(lambda: parser._parse_html(html, backend="html.parser", only=None), repeat)
+        print(f"  {'html.parser, всё дерево':<28} {baseline:8.2f} мс  объявлений: {len(ads)}")
+
+        for backend in backends:
+            ads = parser._parse_html(html, backend=backend)
+            elapsed = measure(lambda: parser._parse_html(html, backend=backend), repeat)
+            print(f"  {backend:<28} {elapsed:8.2f} мс  объявлений: {len(ads)}")
+        print()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    record_command = commands.add_parser("record", help="записать страницу выдачи")
+    record_command.add_argument("platform", choices=sorted(PARSERS))
+    record_command.add_argument("url")
+
+    run_command = commands.add_parser("run", help="замерить разбор записанных страниц")
+    run_command.add_argument("--repeat", type=int, default=20)
+
+    args = arg_parser.parse_args()
+    if args.command == "record":
+        asyncio.run(record(args.platform, args.url))
+    else:
+        run(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,11 @@ from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 from config.settings import settings
 from handlers import common, search, results
+from services.search_repository import search_repository
+from services.http_client import http_client
+from services.browser_pool import browser_pool
+from services.brand_cache import brand_catalogue
+from services.background_checker import BackgroundChecker
 
 
 logging.basicConfig(
@@ -11,13 +16,16 @@ logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 
-async def background_check(bot: Bot, interval: int):
-    while True:
-        # Здесь добавьте логику фоновой проверки
-        await asyncio.sleep(interval)
-
 async def on_startup(bot: Bot, dp: Dispatcher):
-    asyncio.create_task(background_check(bot, interval=600))
+    await http_client.start()
+    asyncio.create_task(BackgroundChecker(bot).start())
+    asyncio.create_task(brand_catalogue.run())
+
+async def on_shutdown():
+    await http_client.close()
+    await browser_pool.close()
+    # Сбрасываем в БД поиски, изменённые после последнего сохранения
+    await asyncio.to_thread(search_repository.close)
 
 async def main():
     bot = Bot(token=settings.BOT_TOKEN)
@@ -30,6 +38,7 @@ async def main():
 
     # Регистрация функции on_startup
     dp.startup.register(lambda: on_startup(bot, dp))
+    dp.shutdown.register(on_shutdown)
 
     await dp.start_polling(bot)
 
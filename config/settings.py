@@ -8,6 +8,103 @@ class Settings:
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36",
         # ... остальные user agents
     ]
+
+    # Общий HTTP-клиент (services/http_client.py)
+    HTTP_POOL_LIMIT = 100           # Всего соединений в пуле
+    HTTP_POOL_LIMIT_PER_HOST = 8    # Соединений на один хост (avito.ru, drom.ru, ...)
+    HTTP_DNS_CACHE_TTL = 300        # Сколько секунд помнить DNS-ответ
+    HTTP_KEEPALIVE_TIMEOUT = 30     # Сколько секунд держать простаивающее соединение
+    HTTP_TIMEOUT = 30               # Общий таймаут запроса
+
+    # Прокси для загрузки выдачи (services/proxy_pool.py): "http://логин:пароль@хост:порт".
+    # Если список пуст, все запросы идут напрямую
+    PROXIES: list[str] = []
+    PROXY_USE_DIRECT = True                 # Использовать и собственный IP бота наравне с прокси
+    PROXY_POOL = {
+        "ewma_alpha": 0.3,                  # Вес последнего запроса в скользящих средних задержки и успехов
+        "initial_latency": 2.0,             # Задержка нового выхода, пока по нему нет замеров, секунд
+        "ban_seconds": 600,                 # На сколько выход выключается после бана на площадке (удваивается)
+        "ban_seconds_max": 6 * 60 * 60
+    }
+
+    # Ограничение частоты запросов к площадкам (services/rate_limiter.py), отдельно для каждого выхода.
+    # rate — запросов в секунду в среднем, burst — сколько можно отправить подряд без ожидания
+    RATE_LIMITS = {
+        "avito.ru": {"rate": 0.5, "burst": 3},
+        "drom.ru": {"rate": 0.5, "burst": 3},
+        "auto.ru": {"rate": 0.5, "burst": 2}
+    }
+    RATE_LIMIT_DEFAULT = {"rate": 1.0, "burst": 5}
+
+    # Повторы при временных ошибках загрузки: задержка base * 2^попытка, не больше cap, плюс случайная добавка
+    FETCH_RETRY_COUNT = 3
+    FETCH_BACKOFF_BASE = 1.0
+    FETCH_BACKOFF_CAP = 8.0
+
+    # Автоматический выключатель площадок (services/circuit_breaker.py): при частых ошибках
+    # запросы к площадке на open_seconds прекращаются, затем half_open_probes пробных запросов решают, включать ли её
+    CIRCUIT_BREAKER = {
+        "window": 20,            # По скольким последним запросам считать долю ошибок
+        "min_calls": 5,          # Меньше запросов в окне — не выключаем
+        "failure_ratio": 0.5,    # Доля ошибок, при которой площадка выключается
+        "open_seconds": 60,
+        "half_open_probes": 2
+    }
+
+    # Кэш списков марок (services/brand_cache.py)
+    BRAND_CACHE_TTL = 24 * 60 * 60          # Через сколько секунд список марок считается устаревшим
+    BRAND_REFRESH_CHECK_INTERVAL = 60 * 60  # Как часто фоновая задача проверяет устаревание
+
+    # Фоновая проверка сохранённых поисков (services/background_checker.py)
+    BACKGROUND_CHECK_INTERVAL = 600         # Пауза между проходами, секунд
+    BACKGROUND_CHECK_CONCURRENCY = {        # Сколько поисков платформы проверяется одновременно
+        "avito": 4,
+        "drom": 4,
+        "autoru": 2
+    }
+
+    # Движок разбора HTML (services/html_backend.py): "selectolax", "lxml" или "html.parser".
+    # Если движок не установлен, берётся самый быстрый из установленных
+    HTML_PARSER_BACKEND = "selectolax"
+
+    # Обход нескольких страниц выдачи (services/crawler.py)
+    CRAWL_MAX_PAGES = {                     # Сколько страниц выдачи читать по умолчанию
+        "avito": 3,
+        "drom": 3
+    }
+    CRAWL_CONCURRENT_PAGES = 2              # Сколько следующих страниц загружать одновременно
+
+    # Кэш разобранной выдачи по URL (services/result_cache.py)
+    RESULT_CACHE_MAX_ENTRIES = 500          # Сколько выдач хранить, старые вытесняются (LRU)
+    RESULT_CACHE_TTL = {                    # Сколько секунд выдача платформы считается свежей
+        "avito": 120,
+        "drom": 120,
+        "autoru": 300
+    }
+
+    # Пул браузера Playwright (services/browser_pool.py)
+    BROWSER_HEADLESS = True
+    BROWSER_MAX_CONTEXTS = 3                # Сколько страниц может работать одновременно
+    BROWSER_CONTEXT_MAX_NAVIGATIONS = 20    # После стольких переходов контекст пересоздаётся
+
+    # Что не загружать в браузере: нам нужны только текст и атрибуты объявлений
+    BROWSER_BLOCKED_REQUESTS = {
+        "autoru": {
+            "resource_types": ["image", "media", "font"],
+            "domains": [
+                "mc.yandex.ru", "an.yandex.ru", "ads.adfox.ru",
+                "googletagmanager.com", "google-analytics.com", "doubleclick.net",
+                "top-fwz1.mail.ru"
+            ]
+        },
+        "drom": {
+            "resource_types": ["image", "media", "font"],
+            "domains": [
+                "mc.yandex.ru", "an.yandex.ru", "ads.adfox.ru", "googletagmanager.com",
+                "google-analytics.com", "doubleclick.net", "top-fwz1.mail.ru", "counter.yadro.ru"
+            ]
+        }
+    }
     
 
 settings = Settings()
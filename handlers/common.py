@@ -9,7 +9,6 @@ from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from config.settings import settings
 from aiogram.filters import StateFilter
-from services.search_service import clean_price
 from aiogram.types import CallbackQuery, Message
 from keyboards.builders import (
     main_menu_keyboard, about_keyboard, back_to_menu,
@@ -27,22 +26,13 @@ from schemas.callbacks import (
     ExportCallback
 )
 from aiogram.utils.keyboard import InlineKeyboardBuilder, InlineKeyboardButton
-from services.search_service import (
-    get_user_searches, 
-    delete_search_by_id as remove_search_by_id,
-    toggle_notifications, 
-    load_searches,
-    import_user_searches,
-    cleanup_old_searches, 
-    get_search_info,
-    delete_search_by_id,
-    get_search_results,
-    get_ads_by_model,
-    get_unique_brands_and_models,
-    compare_prices_by_model
-)
-
-from services.export_service import export_user_searches  
+from services.async_storage import repo
+from services.single_flight import single_flight
+from services.result_cache import result_cache
+from services.page_fingerprint import page_fingerprints
+from services.circuit_breaker import circuit_breakers
+from services.proxy_pool import proxy_pool
+from services.rate_limiter import rate_limiter
 from models.states import ParserState
 
 import aiofiles
@@ -77,19 +67,86 @@ async def admin_stats(message: types.Message):
     if message.from_user.id not in settings.ADMIN_IDS:
         return
 
-    searches = load_searches()
-    total_users = len(searches)
-    active_searches = sum(len(platform_searches) for user in searches.values() for platform_searches in user.values())
-    inactive_searches = cleanup_old_searches(days=30)  # Автоматически чистим старые поиски
+    total_users, active_searches = await repo.stats()
+    inactive_searches = await repo.cleanup(days=30)  # Автоматически чистим старые поиски
+    flights = single_flight.stats()
+
+    breaker_lines = []
+    for platform, breaker in sorted(circuit_breakers.states().items()):
+        if breaker.state == "open":
+            state = f"🔴 выключена (пробный запрос через {breaker.seconds_until_probe():.0f} с)"
+        elif breaker.state == "half_open":
+            state = "🟡 пробные запросы"
+        else:
+            state = "🟢 работает"
+        breaker_lines.append(
+            f"{platform}: {state}, выключалась {breaker.times_opened} раз, отклонено запросов {breaker.rejected}\n"
+        )
 
     await message.answer(
         f"📊 <b>Статистика бота</b>\n\n"
         f"👥 Пользователей: {total_users}\n"
         f"🔍 Активных поисков: {active_searches}\n"
         f"🗑️ Удалено неактивных: {inactive_searches}\n"
+        f"⚡ Загрузок выдачи: {flights['started']}, совмещено одинаковых: {flights['joined']}\n"
+        f"{''.join(breaker_lines)}"
         f"⏳ Последняя проверка: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
     )
 
+@router.message(Command("admin_cache"))
+async def admin_cache(message: types.Message):
+    if message.from_user.id not in settings.ADMIN_IDS:
+        return
+
+    stats = result_cache.stats()
+    lines = [
+        f"🗄️ <b>Кэш выдачи</b>\n",
+        f"Записей: {stats['entries']} из {stats['max_entries']}",
+        f"Вытеснено: {stats['evictions']}, устарело: {stats['expired']}, "
+        f"отдано устаревших при недоступной площадке: {stats['stale_served']}\n"
+    ]
+    for platform in sorted(set(stats['hits']) | set(stats['misses'])):
+        hits = stats['hits'].get(platform, 0)
+        misses = stats['misses'].get(platform, 0)
+        ratio = hits / (hits + misses) * 100 if hits + misses else 0
+        lines.append(f"{platform}: попаданий {hits}, промахов {misses} ({ratio:.0f}%)")
+
+    pages = page_fingerprints.stats()
+    if pages['parsed'] or pages['skipped']:
+        lines.append("\n📄 <b>Разбор страниц</b> (пропущен, если выдача не изменилась)")
+        for platform in sorted(set(pages['parsed']) | set(pages['skipped'])):
+            lines.append(
+                f"{platform}: разобрано {pages['parsed'].get(platform, 0)}, "
+                f"пропущено {pages['skipped'].get(platform, 0)}"
+            )
+
+    await message.answer("\n".join(lines), parse_mode=settings.PARSE_MODE)
+
+@router.message(Command("admin_proxies"))
+async def admin_proxies(message: types.Message):
+    if message.from_user.id not in settings.ADMIN_IDS:
+        return
+
+    lines = ["🌐 <b>Выходы (прокси)</b>\n"]
+    for name, platforms in proxy_pool.stats().items():
+        lines.append(f"<b>{name}</b>")
+        if not platforms:
+            lines.append("  запросов ещё не было")
+        for platform, health in sorted(platforms.items()):
+            banned = f", ⛔ бан ещё {health['banned_for']} с" if health['banned_for'] else ""
+            lines.append(
+                f"  {platform}: {health['latency']} с, успехов {health['success_rate']:.0%} "
+                f"({health['successes']}/{health['successes'] + health['failures']}), банов {health['bans']}{banned}"
+            )
+
+    waits = rate_limiter.stats()
+    if waits:
+        lines.append("\n⏱️ <b>Ожидание лимитов</b>")
+        for key, bucket in sorted(waits.items()):
+            lines.append(f"{key}: ожиданий {bucket['waits']}, всего {bucket['waited_seconds']} с")
+
+    await message.answer("\n".join(lines), parse_mode=settings.PARSE_MODE)
+
 @router.message(Command("admin_broadcast"))
 async def admin_broadcast(message: types.Message, bot: Bot):
     if message.from_user.id not in settings.ADMIN_IDS:
@@ -99,8 +156,7 @@ async def admin_broadcast(message: types.Message, bot: Bot):
         await message.answer("Ответьте этим командой на сообщение для рассылки")
         return
 
-    searches = load_searches()
-    users = list(searches.keys())
+    users = await repo.user_ids()
     success = 0
     failed = 0
 
@@ -127,7 +183,7 @@ async def admin_broadcast(message: types.Message, bot: Bot):
 
 @router.message(Command("start"))
 async def cmd_start(message: types.Message):
-    save_chat_id(message.chat.id)
+    await asyncio.to_thread(save_chat_id, message.chat.id)
     await message.answer(
         "🚗 <b>AutoParserBot - поиск автообъявлений</b>\n"
         "Выберите действие:",
@@ -141,7 +197,7 @@ async def prev_result_handler(callback: types.CallbackQuery):
     try:
         _, search_id, index = callback.data.split(":")
         index = int(index)
-        results = get_search_results(callback.from_user.id, search_id)
+        results = await repo.get_results(callback.from_user.id, search_id)
         
         if index >= 0 and index < len(results):
             await show_advertisement(callback, results[index], search_id, index, len(results))
@@ -157,7 +213,7 @@ async def next_result_handler(callback: types.CallbackQuery):
     try:
         _, search_id, index = callback.data.split(":")
         index = int(index)
-        results = get_search_results(callback.from_user.id, search_id)
+        results = await repo.get_results(callback.from_user.id, search_id)
         
         if index < len(results):
             await show_advertisement(callback, results[index], search_id, index, len(results))
@@ -172,7 +228,8 @@ async def next_result_handler(callback: types.CallbackQuery):
 async def my_searches_callback(callback: types.CallbackQuery):
     try:
         user_id = callback.from_user.id
-        keyboard = build_main_searches_keyboard(user_id)  # Убедитесь, что эта функция правильно возвращает клавиатуру
+        searches = await repo.get_user_searches(user_id)
+        keyboard = build_main_searches_keyboard(searches)
         
         # Отправляем сообщение с клавиатурой
         await callback.message.edit_text(
@@ -193,7 +250,7 @@ async def view_search_handler(callback: types.CallbackQuery):
     search_id = callback.data.split(":")[1]
     keyboard = build_search_details_keyboard(search_id)
 
-    search = get_search_info(callback.from_user.id, search_id)
+    search = await repo.get_info(callback.from_user.id, search_id)
     if not search:
         await callback.answer("Поиск не найден", show_alert=True)
         return
@@ -216,7 +273,7 @@ async def view_search_handler(callback: types.CallbackQuery):
 async def show_results_handler(callback: types.CallbackQuery, state: FSMContext):
     try:
         search_id = callback.data.split(":")[1]
-        results = get_search_results(callback.from_user.id, search_id)
+        results = await repo.get_results(callback.from_user.id, search_id)
         
         if not results:
             await callback.answer("Нет результатов для отображения", show_alert=True)
@@ -246,7 +303,7 @@ async def export_search_handler(callback: types.CallbackQuery):
 async def delete_search_handler(callback: types.CallbackQuery):
     try:
         search_id = callback.data.split(":")[1]
-        if delete_search_by_id(callback.from_user.id, search_id):
+        if await repo.delete(callback.from_user.id, search_id):
             await callback.answer("Поиск успешно удалён", show_alert=False)
             # Возвращаемся к списку поисков
             await my_searches_callback(callback)
@@ -284,7 +341,7 @@ async def show_advertisement(
 @router.callback_query(SearchPaginationCallback.filter())
 async def paginate_searches_callback(callback: types.CallbackQuery, callback_data: SearchPaginationCallback):
     user_id = str(callback.from_user.id)
-    data = get_user_searches(user_id)
+    data = await repo.get_user_searches(user_id)
 
     all_searches = []
     for platform, searches in data.items():
@@ -327,7 +384,7 @@ async def delete_search_handler(
         search_id = callback_data.search_id
 
         # Удаляем поиск из базы данных
-        remove_search_by_id(user_id, search_id)
+        await repo.delete(user_id, search_id)
 
         # Успешное уведомление
         await callback.answer("Поиск успешно удалён!", show_alert=False)
@@ -349,7 +406,7 @@ async def manage_notifications_handler(callback: types.CallbackQuery):
         user_id = str(callback.from_user.id)
         
         # Get all searches for this user
-        user_searches = get_user_searches(user_id)
+        user_searches = await repo.get_user_searches(user_id)
         
         if not user_searches:
             await callback.answer("У вас нет активных поисков.", show_alert=True)
@@ -396,7 +453,7 @@ async def handle_toggle_notification(callback: types.CallbackQuery):
         user_id = callback.from_user.id
         
         # Use the existing toggle_notifications function
-        new_status = toggle_notifications(user_id, search_id)
+        new_status = await repo.toggle_notifications(user_id, search_id)
         
         await callback.answer(
             f"Уведомления {'включены' if new_status else 'отключены'}",
@@ -421,7 +478,7 @@ async def toggle_notification_handler(
         search_id = callback_data.search_id  # Get search_id from callback_data
 
         # Переключаем статус уведомлений и получаем новый статус
-        new_status = toggle_notifications(user_id, search_id)
+        new_status = await repo.toggle_notifications(user_id, search_id)
 
         # Обновляем текст кнопки в клавиатуре
         keyboard = callback.message.reply_markup
@@ -467,7 +524,7 @@ async def process_export_searches(message: types.Message, state: FSMContext):
         return
 
     try:
-        file_path = export_user_searches(message.from_user.id, filename)
+        file_path = await repo.export(message.from_user.id, filename)
         await message.answer_document(
             document=types.FSInputFile(file_path),
             caption="Ваши поиски успешно экспортированы"
@@ -483,7 +540,7 @@ async def export_json_handler(callback: types.CallbackQuery):
     try:
         search_id = callback.data.split(":")[1]
         user_id = callback.from_user.id
-        file_path = export_user_searches(user_id, f"search_{search_id}", format="json")
+        file_path = await repo.export(user_id, f"search_{search_id}", format="json")
         
         await callback.message.answer_document(
             document=types.FSInputFile(file_path),
@@ -499,7 +556,7 @@ async def export_csv_handler(callback: types.CallbackQuery):
     try:
         search_id = callback.data.split(":")[1]
         user_id = callback.from_user.id
-        file_path = export_user_searches(user_id, f"search_{search_id}", format="csv")
+        file_path = await repo.export(user_id, f"search_{search_id}", format="csv")
         
         await callback.message.answer_document(
             document=types.FSInputFile(file_path),
@@ -515,7 +572,7 @@ async def export_excel_handler(callback: types.CallbackQuery):
     try:
         search_id = callback.data.split(":")[1]
         user_id = callback.from_user.id
-        file_path = export_user_searches(user_id, f"search_{search_id}", format="xlsx", search_id=search_id)
+        file_path = await repo.export(user_id, f"search_{search_id}", format="xlsx", search_id=search_id)
 
         await callback.message.answer_document(
             document=types.FSInputFile(file_path),
@@ -539,7 +596,7 @@ async def process_import_searches(message: types.Message, state: FSMContext, bot
             content = await f.read()
             searches = json.loads(content)
 
-        import_user_searches(message.from_user.id, searches)
+        await repo.import_searches(message.from_user.id, searches)
         await message.answer("Ваши поиски успешно импортированы!")
     except Exception as e:
         await message.answer(f"Ошибка при импорте: {str(e)}")
@@ -648,7 +705,7 @@ async def start_compare_by_model(callback: CallbackQuery, state: FSMContext):
         user_id = callback.from_user.id
         
         # Получаем информацию о поиске
-        search = get_search_info(user_id, search_id)
+        search = await repo.get_info(user_id, search_id)
         if not search:
             await callback.answer("Поиск не найден", show_alert=True)
             return
@@ -660,7 +717,7 @@ async def start_compare_by_model(callback: CallbackQuery, state: FSMContext):
             return
             
         # Получаем все марки и модели пользователя
-        brands_models = get_unique_brands_and_models(user_id)
+        brands_models = await repo.unique_brands_and_models(user_id)
         
         if not brands_models:
             await callback.message.edit_text(
@@ -725,7 +782,7 @@ async def select_model(callback: CallbackQuery, state: FSMContext):
         data = await state.get_data()
         brand = data['selected_brand']
         
-        comparison = compare_prices_by_model(
+        comparison = await repo.compare_prices_by_model(
             user_id=callback.from_user.id,
             brand=brand,
             model=model
@@ -811,7 +868,7 @@ async def show_platform_ads(callback: CallbackQuery, state: FSMContext):
     _, brand, model, platform = callback.data.split(":", 3)
     user_id = callback.from_user.id
     
-    ads = get_ads_by_model(user_id, brand, model, platform)
+    ads = await repo.ads_by_model(user_id, brand, model, platform)
     
     if not ads:
         await callback.answer("Нет объявлений для этой платформы")
@@ -820,7 +877,7 @@ async def show_platform_ads(callback: CallbackQuery, state: FSMContext):
     message_text = f"🚘 <b>{brand.capitalize()} {model.capitalize()} на {platform.upper()}</b>\n\n"
     
     for idx, ad in enumerate(ads[:5], 1):
-        price = f"{int(clean_price(ad.get('price', '0'))):,} ₽" if ad.get('price') else "Цена не указана"
+        price = f"{ad['price_value']:,} ₽" if ad.get('price_value') else "Цена не указана"
         year = ad.get('year', 'г.в. не указан')
         url = ad.get('url', '#')
         
@@ -851,7 +908,7 @@ async def compare_search_handler(callback: types.CallbackQuery):
         user_id = callback.from_user.id
 
         # Получаем результаты для сравнения (примерная логика)
-        comparison = compare_prices_by_model(user_id, search_id)
+        comparison = await repo.compare_prices_by_model(user_id, search_id)
         if not comparison:
             await callback.answer("Нет данных для сравнения.", show_alert=True)
             return
@@ -4,7 +4,7 @@ from aiogram.fsm.context import FSMContext
 from models.states import ParserState
 from config.settings import settings
 from keyboards.builders import next_ad_keyboard
-from services.search_service import save_search
+from services.async_storage import repo
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,7 +23,7 @@ async def show_results(message: types.Message, state: FSMContext):
     params = data.get('params', {})  # Добавляем параметры поиска
     
     # Сохраняем результаты в базу данных
-    search_id, is_new = save_search(
+    search_id, is_new = await repo.save(
         user_id=message.from_user.id,
         platform=platform,
         params=params,
@@ -4,22 +4,27 @@ from aiogram.filters import StateFilter
 from services.avito_parser import AvitoParser
 from services.drom_parser import DromParser
 from services.autoru_parser import AutoRuParser
-from services.search_service import save_search
+from services.async_storage import repo
+from services.brand_cache import brand_catalogue
+from services.errors import FetchError
 from datetime import datetime
 from keyboards.builders import (
     get_brands_keyboard,
     regions_keyboard,
     radius_keyboard,
+    pages_keyboard,
     cities_keyboard,
     back_to_platforms_button,
     back_to_menu_keyboard
 )
 from config.settings import settings
-from storage.cities import locations_dict
+from storage.city_index import city_index
+from services.city_search import city_search
 from transliterate import translit
 from models.states import ParserState
+from models.listing import Listing
+from typing import List
 import logging
-import json
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -39,20 +44,10 @@ def normalize_city_name(city: str) -> str:
     except:
         return city.lower().replace(' ', '_')
 
-def load_cities_data(file_path: str) -> dict:
-    try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return json.load(file)
-    except Exception as e:
-        logger.error(f"Ошибка загрузки данных из {file_path}: {e}")
-        return {}
-
 @router.callback_query(F.data.startswith("start_avito_search"))
 async def start_avito_search_process(callback: types.CallbackQuery, state: FSMContext):
     await state.set_state(ParserState.waiting_brand)
-    parser = AvitoParser()
-    html = await parser.fetch_html("https://www.avito.ru/moskva/avtomobili")
-    brands = await parser.parse_brands(html)
+    brands = await brand_catalogue.get("avito")
 
     total_pages = (len(brands) + 3) // 4
 
@@ -67,10 +62,7 @@ async def start_avito_search_process(callback: types.CallbackQuery, state: FSMCo
 @router.callback_query(F.data.startswith("start_drom_search"))
 async def start_drom_search_process(callback: types.CallbackQuery, state: FSMContext):
     await state.set_state(ParserState.waiting_brand)
-    parser = DromParser()
-
-    # Теперь не нужно fetch_html
-    brands = await parser.parse_brands_drom()  # <-- без html
+    brands = await brand_catalogue.get("drom")
 
     logger.info(f"Марки, полученные из Drom: {brands}")
     
@@ -94,8 +86,7 @@ async def start_drom_search_process(callback: types.CallbackQuery, state: FSMCon
 @router.callback_query(F.data.startswith("start_autoru_search"))
 async def start_autoru_search_process(callback: types.CallbackQuery, state: FSMContext):
     await state.set_state(ParserState.waiting_brand)
-    parser = AutoRuParser()
-    brands = await parser.parse_brands()
+    brands = await brand_catalogue.get("autoru")
     logger.info(f"Марки, полученные из Auto.ru: {brands}")
     
     total_pages = (len(brands) + 3) // 4
@@ -181,18 +172,33 @@ async def process_custom_region(message: types.Message, state: FSMContext):
 
         logger.info(f"Пользователь ввёл город: {russian_city} -> нормализовано: {normalized_city}")
 
-        matched_cities = []
-        for city_path, city_id in locations_dict.items():
-            if normalized_city in city_path.lower():
-                matched_cities.append({
-                    "id": city_id,
-                    "name": get_city_name(city_path),
-                    "path": city_path
-                })
+        matched_cities = [
+            {
+                "id": city_id,
+                "name": get_city_name(city_path),
+                "path": city_path
+            }
+            for city_path, city_id in city_index.by_prefix(normalized_city)
+        ]
 
         if not matched_cities:
-            logger.warning(f"Город не найден: {russian_city}")
-            await message.answer(f"Город '{russian_city}' не найден. Попробуйте ввести другое название:")
+            # Точных совпадений нет — предлагаем похожие названия (опечатки, пропущенные буквы)
+            suggestions = city_search.find_avito(normalized_city)
+            if not suggestions:
+                logger.warning(f"Город не найден: {russian_city}")
+                await message.answer(f"Город '{russian_city}' не найден. Попробуйте ввести другое название:")
+                return
+
+            for city in suggestions:
+                city['name'] = get_city_name(city['path'])
+            logger.info(f"Нечёткие совпадения для города {russian_city}: {[c['path'] for c in suggestions]}")
+            await state.update_data(matched_cities=suggestions)
+            await message.answer(
+                f"🤔 Город «{russian_city}» не найден. Возможно, вы имели в виду:",
+                reply_markup=cities_keyboard(suggestions, page=0),
+                parse_mode=settings.PARSE_MODE
+            )
+            await state.set_state(ParserState.choosing_city)
             return
 
         if len(matched_cities) == 1:
@@ -220,12 +226,17 @@ async def process_custom_region(message: types.Message, state: FSMContext):
     elif platform == "drom":
         parser = DromParser()
         matches = await parser.find_all_matching_cities(russian_city)
+        fuzzy = False
 
         if not matches:
-            await message.answer("❌ Такой город не найден. Попробуйте снова.")
-            return
-
-        if len(matches) == 1:
+            matches = city_search.find_drom(russian_city)
+            fuzzy = True
+            if not matches:
+                await message.answer("❌ Такой город не найден. Попробуйте снова.")
+                return
+            logger.info(f"Нечёткие совпадения Drom для города {russian_city}: {[m['city'] for m in matches]}")
+
+        if len(matches) == 1 and not fuzzy:
             match = matches[0]
             await state.update_data(region_name=match['city'], city_link=match['link'])
             await message.answer(
@@ -246,6 +257,7 @@ async def process_custom_region(message: types.Message, state: FSMContext):
             keyboard = types.InlineKeyboardMarkup(inline_keyboard=[buttons[i:i + 2] for i in range(0, len(buttons), 2)])
             await state.update_data(drom_city_matches=matches)
             await message.answer(
+                f"🤔 Город «{russian_city}» не найден. Возможно, вы имели в виду:" if fuzzy else
                 f"🔎 Найдено несколько городов с названием «{russian_city}». Выберите нужный:",
                 reply_markup=keyboard,
                 parse_mode=settings.PARSE_MODE
@@ -301,14 +313,13 @@ async def handle_city_selection(callback: types.CallbackQuery, state: FSMContext
 
     if platform in ["avito", "autoru"]:
         selected_city = None
-        for city_path, c_id in locations_dict.items():
-            if c_id == city_id:
-                selected_city = {
-                    "id": c_id,
-                    "name": get_city_name(city_path),
-                    "path": city_path
-                }
-                break
+        city_path = city_index.path(city_id)
+        if city_path:
+            selected_city = {
+                "id": city_id,
+                "name": get_city_name(city_path),
+                "path": city_path
+            }
 
         if selected_city:
             logger.info(f"Пользователь выбрал город: {selected_city['name']} -> {selected_city['path']}")
@@ -369,26 +380,55 @@ async def process_max_price(message: types.Message, state: FSMContext):
             raise ValueError
 
         await state.update_data(max_price=max_price)
-        data = await state.get_data()
+    except ValueError:
+        await message.answer("Пожалуйста, введите корректное число для максимальной цены (например: 500000)")
+        return
+
+    data = await state.get_data()
+    if data['platform'] in settings.CRAWL_MAX_PAGES:
+        # Avito и Drom листают выдачу: глубина сохраняется в поиске и действует на фоновые проверки
+        await message.answer(
+            "📄 <b>Сколько страниц выдачи просматривать?</b>",
+            reply_markup=pages_keyboard(),
+            parse_mode=settings.PARSE_MODE
+        )
+        await state.set_state(ParserState.waiting_pages)
+        return
+
+    await run_search(message, state, message.from_user.id)
+
+
+@router.callback_query(F.data.startswith("pages_"))
+async def process_pages(callback: types.CallbackQuery, state: FSMContext):
+    if await state.get_state() != ParserState.waiting_pages:
+        return
 
-        logger.info(f"Данные в state перед вызовом parse_ads: {data}")
+    await state.update_data(pages=int(callback.data.split('_')[1]))
+    await callback.answer()
+    await run_search(callback.message, state, callback.from_user.id)
 
-        await message.answer("🔍 Поиск объявлений начат. Пожалуйста, подождите...")
 
+async def run_search(message: types.Message, state: FSMContext, user_id: int):
+    data = await state.get_data()
+    logger.info(f"Данные в state перед вызовом parse_ads: {data}")
+
+    await message.answer("🔍 Поиск объявлений начат. Пожалуйста, подождите...")
+
+    try:
         platform = data['platform']
         if platform == "avito":
-            await parse_ads_avito(message, state, data)
+            await parse_ads_avito(message, state, data, user_id)
         elif platform == "drom":
-            await parse_ads_drom(message, state, data)
+            await parse_ads_drom(message, state, data, user_id)
         elif platform == "autoru":
-            await parse_ads_autoru(message, state, data)
+            await parse_ads_autoru(message, state, data, user_id)
         else:
             await message.answer("Ошибка: Неизвестная платформа.")
+    except FetchError as e:
+        logger.warning(f"Поиск не выполнен: {e}")
+        await message.answer(e.user_message)
 
-    except ValueError:
-        await message.answer("Пожалуйста, введите корректное число для максимальной цены (например: 500000)")
-
-async def parse_ads_autoru(message: types.Message, state: FSMContext, data: dict):
+async def parse_ads_autoru(message: types.Message, state: FSMContext, data: dict, user_id: int):
     parser = AutoRuParser()
     ads = await parser.parse_ads(
         brand=data['brand'],
@@ -397,22 +437,23 @@ async def parse_ads_autoru(message: types.Message, state: FSMContext, data: dict
         min_price=data['min_price'],
         max_price=data['max_price']
     )
-    await process_ads_results(message, state, ads)
+    await process_ads_results(message, state, ads, user_id)
 
 
-async def parse_ads_avito(message: types.Message, state: FSMContext, data: dict):
+async def parse_ads_avito(message: types.Message, state: FSMContext, data: dict, user_id: int):
     parser = AvitoParser()
     ads = await parser.parse_ads(
         brand=data['brand'],
         city=data['region_name'],
         radius_km=data['radius'],
         min_price=data['min_price'],
-        max_price=data['max_price']
+        max_price=data['max_price'],
+        max_pages=data.get('pages')
     )
-    await process_ads_results(message, state, ads)
+    await process_ads_results(message, state, ads, user_id)
 
 
-async def parse_ads_drom(message: types.Message, state: FSMContext, data: dict):
+async def parse_ads_drom(message: types.Message, state: FSMContext, data: dict, user_id: int):
     parser = DromParser()
     ads = await parser.parse_ads(
         brand=data['brand'],
@@ -420,47 +461,18 @@ async def parse_ads_drom(message: types.Message, state: FSMContext, data: dict):
         distance=data['distance'],
         min_price=data['min_price'],
         max_price=data['max_price'],
-        city_link=data.get('city_link')
+        city_link=data.get('city_link'),
+        max_pages=data.get('pages')
     )
-    
-    # Преобразуем объявления в словари, если они еще не словари
-    ads_data = []
-    for ad in ads:
-        if isinstance(ad, dict):
-            ads_data.append(ad)
-        else:
-            ads_data.append({
-                'id': getattr(ad, 'id', None),
-                'title': getattr(ad, 'title', 'Без названия'),
-                'price': getattr(ad, 'price', 'Не указана'),
-                'address': getattr(ad, 'address', 'Не указано'),
-                'url': getattr(ad, 'url', '#'),
-                'date': getattr(ad, 'date', 'Не указана')
-            })
-    
-    await process_ads_results(message, state, ads_data)
+    await process_ads_results(message, state, ads, user_id)
 
-async def process_ads_results(message: types.Message, state: FSMContext, ads: list):
+async def process_ads_results(message: types.Message, state: FSMContext, ads: List[Listing], user_id: int):
     if not ads:
         await message.answer("😔 Свежих объявлений нет. Попробуйте изменить параметры поиска.")
         return
 
-    # Преобразуем объявления в словари, если они еще не словари
-    ads_data = []
-    for ad in ads:
-        if isinstance(ad, dict):
-            ads_data.append(ad)
-        else:
-            ads_data.append({
-                'id': getattr(ad, 'id', None),
-                'title': getattr(ad, 'title', 'Без названия'),
-                'price': getattr(ad, 'price', 'Не указана'),
-                'brand': getattr(ad, 'brand', 'Не указана'),  # Добавлено
-                'model': getattr(ad, 'model', 'Не указана'),  # Добавлено
-                'address': getattr(ad, 'address', 'Не указано'),
-                'url': getattr(ad, 'url', '#'),
-                'date': getattr(ad, 'date', 'Не указана')
-            })
+    # В состояние и хранилище объявления попадают словарями
+    ads_data = [ad.to_dict() for ad in ads]
 
     data = await state.get_data()
     search_params = {
@@ -471,9 +483,15 @@ async def process_ads_results(message: types.Message, state: FSMContext, ads: li
         "max_price": data['max_price'],
         "platform": data['platform']
     }
-
-    save_search(
-        user_id=message.from_user.id,
+    if data['platform'] == "drom":
+        # Радиус Drom хранится в state как distance; по ссылке города не спутать одноимённые города
+        search_params["distance"] = data.get('distance', 0)
+        search_params["city_link"] = data.get('city_link')
+    if data.get('pages'):
+        search_params["pages"] = data['pages']
+
+    await repo.save(
+        user_id=user_id,
         platform=data['platform'],
         params=search_params,
         last_result_ids=[ad.get('id') for ad in ads_data] if ads_data else [],
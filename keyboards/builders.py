@@ -2,7 +2,7 @@ from aiogram.utils.keyboard import InlineKeyboardBuilder, InlineKeyboardMarkup,
 from keyboards.buttons import (
     about_button, avito_button, drom_button, autoru_button, author_button,
     back_button, brand_button, region_button, city_button, 
-    radius_button, navigation_button, next_ad_button, search_action_button,
+    radius_button, pages_button, navigation_button, next_ad_button, search_action_button,
     export_csv_button, export_json_button, select_compare_button,
     start_search_button, back_to_platforms_button, my_searches_button,
     manage_notifications_button, export_button, import_button
@@ -13,8 +13,7 @@ from schemas.callbacks import (
     ToggleCallback,
     ExportCallback
 )
-from services.search_service import get_user_searches
-from typing import List 
+from typing import Dict, List 
 import logging
 
 
@@ -117,6 +116,15 @@ def radius_keyboard():
     builder.adjust(2)
     return builder.as_markup()
 
+def pages_keyboard():
+    builder = InlineKeyboardBuilder()
+    depths = [("1 страница", 1), ("3 страницы", 3), ("5 страниц", 5), ("10 страниц", 10)]
+    for text, pages in depths:
+        builder.add(pages_button(text, pages))
+    builder.add(back_button)
+    builder.adjust(2)
+    return builder.as_markup()
+
 def next_ad_keyboard(index: int):
     builder = InlineKeyboardBuilder()
     builder.add(next_ad_button(index))
@@ -313,9 +321,8 @@ def export_options_keyboard(search_id: str) -> InlineKeyboardMarkup:
     
     return builder.as_markup()
 
-def build_main_searches_keyboard(user_id: int) -> InlineKeyboardMarkup:
+def build_main_searches_keyboard(searches: Dict[str, List[dict]]) -> InlineKeyboardMarkup:
     """Основная клавиатура для раздела 'Мои поиски'"""
-    searches = get_user_searches(user_id)
     builder = InlineKeyboardBuilder()
     
     if not searches:
@@ -58,6 +58,12 @@ def radius_button(text: str, radius: int) -> InlineKeyboardButton:
         callback_data=f"radius_{radius}"
     )
 
+def pages_button(text: str, pages: int) -> InlineKeyboardButton:
+    return InlineKeyboardButton(
+        text=text,
+        callback_data=f"pages_{pages}"
+    )
+
 def navigation_button(text: str, page: int) -> InlineKeyboardButton:
     return InlineKeyboardButton(
         text=text,
@@ -0,0 +1,134 @@
+import re
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+YEAR_PATTERN = re.compile(r"\b(19[5-9]\d|20\d\d)\b")
+MILEAGE_PATTERN = re.compile(r"(\d[\d\s]*)\s*(тыс\.?)?\s*км")
+ENGINE_VOLUME_PATTERN = re.compile(r"\b(\d{1,2}[.,]\d)\s*(?:л\b|AT\b|MT\b|AMT\b|CVT\b|RT\b)")
+ENGINE_POWER_PATTERN = re.compile(r"(\d{2,4})\s*л\.\s*с\.")
+
+
+def parse_int(text: Optional[str]) -> Optional[int]:
+    """Число из текста вида «1 500 000 ₽»: все цифры подряд, None — если цифр нет"""
+    if not text:
+        return None
+    digits = "".join(char for char in text if char.isdigit())
+    return int(digits) if digits else None
+
+
+def parse_year(text: Optional[str]) -> Optional[int]:
+    """Год выпуска из заголовка или описания («BMW X5, 2015»)"""
+    match = YEAR_PATTERN.search(text or "")
+    return int(match.group(1)) if match else None
+
+
+def parse_mileage(text: Optional[str]) -> Optional[int]:
+    """Пробег в км из текста «150 000 км» или «85 тыс. км»"""
+    match = MILEAGE_PATTERN.search(text or "")
+    if not match:
+        return None
+    value = parse_int(match.group(1))
+    if value is not None and match.group(2):
+        value *= 1000
+    return value
+
+
+def parse_engine(text: Optional[str]) -> Tuple[Optional[float], Optional[int]]:
+    """Объём (л) и мощность (л.с.) двигателя из «2.0 л (150 л.с.)», «3.0 AT (249 л.с.)» или «2.0 л / 249 л.с.»"""
+    text = text or ""
+    volume = ENGINE_VOLUME_PATTERN.search(text)
+    power = ENGINE_POWER_PATTERN.search(text)
+    return (
+        float(volume.group(1).replace(",", ".")) if volume else None,
+        int(power.group(1)) if power else None
+    )
+
+
+def format_price(price: Optional[int]) -> str:
+    return f"{price:,} ₽".replace(",", " ") if price else "Не указана"
+
+
+NUMERIC_FIELDS = ("year", "mileage", "engine_volume", "engine_power")
+
+
+@dataclass(frozen=True, slots=True)
+class Listing:
+    """
+    Объявление любой площадки в одном виде: его возвращают все парсеры, его же хранит кэш выдачи.
+    Неизменяемое, потому что один и тот же объект из кэша получают разные пользователи.
+    """
+    source: str                     # "avito", "drom" или "autoru"
+    id: str                         # ID объявления на площадке, если его нет — ссылка
+    title: str
+    url: str
+    price: Optional[int] = None     # Рубли
+    year: Optional[int] = None
+    mileage: Optional[int] = None   # Километры
+    engine_volume: Optional[float] = None  # Литры
+    engine_power: Optional[int] = None     # Лошадиные силы
+    address: str = "Не указано"
+    date: str = "Не указана"
+    image_url: str = ""
+
+    @property
+    def price_text(self) -> str:
+        return format_price(self.price)
+
+    def to_dict(self) -> dict:
+        """
+        Формат хранения поиска и состояния FSM: 'price' — строка для показа, 'price_value' — число для сравнений.
+        Неизвестные год, пробег и двигатель не пишутся.
+        """
+        data = {
+            'id': self.id,
+            'source': self.source,
+            'title': self.title,
+            'price': self.price_text,
+            'price_value': self.price,
+            'address': self.address,
+            'url': self.url,
+            'date': self.date
+        }
+        for field in NUMERIC_FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                data[field] = value
+        if self.image_url:
+            data['image_url'] = self.image_url
+        return data
+
+
+def normalize_record(ad: dict) -> dict:
+    """
+    Дописывает числа в сохранённое объявление старого формата (до Listing.to_dict) и возвращает его же.
+    Вызывается один раз при загрузке из хранилища, чтобы сравнения и сортировки не разбирали строки.
+    """
+    if 'price_value' in ad:
+        return ad
+
+    price = ad.get('price')
+    if isinstance(price, (int, float)):
+        # Auto.ru раньше сохранял цену числом
+        ad['price_value'] = int(price) or None
+        ad['price'] = format_price(ad['price_value'])
+    else:
+        ad['price_value'] = parse_int(price)
+
+    title = ad.get('title') or ""
+    if not ad.get('year'):
+        year = parse_year(title)
+        if year is None:
+            ad.pop('year', None)
+        else:
+            ad['year'] = year
+    if 'mileage' not in ad:
+        mileage = parse_mileage(ad.get('kmage') or title)
+        if mileage is not None:
+            ad['mileage'] = mileage
+    if 'engine_volume' not in ad and 'engine_power' not in ad:
+        volume, power = parse_engine(title)
+        if volume is not None:
+            ad['engine_volume'] = volume
+        if power is not None:
+            ad['engine_power'] = power
+    return ad
@@ -8,6 +8,7 @@ class ParserState(StatesGroup):
     choosing_city = State()
     waiting_min_price = State()
     waiting_max_price = State()
+    waiting_pages = State()
     viewing_results = State()
     export_searches = State()
     import_searches = State()
@@ -0,0 +1,60 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from services import search_service
+from services.export_service import export_user_searches
+
+
+class AsyncSearchStorage:
+    """
+    Асинхронный фасад над search_service для хендлеров.
+    Каждый вызов уходит в пул потоков, поэтому обращение к БД не блокирует event loop.
+    """
+
+    async def get_user_searches(self, user_id: int) -> Dict[str, List[dict]]:
+        return await asyncio.to_thread(search_service.get_user_searches, user_id)
+
+    async def get_results(self, user_id: int, search_id: str) -> List[dict]:
+        return await asyncio.to_thread(search_service.get_search_results, user_id, search_id)
+
+    async def get_info(self, user_id: int, search_id: str) -> Optional[dict]:
+        return await asyncio.to_thread(search_service.get_search_info, user_id, search_id)
+
+    async def save(self, user_id: int, platform: str, params: dict, last_result_ids: List[str],
+                   last_results: List[dict], notifications: bool = True) -> Tuple[str, bool]:
+        return await asyncio.to_thread(
+            search_service.save_search, user_id, platform, params, last_result_ids, last_results, notifications
+        )
+
+    async def delete(self, user_id: int, search_id: str) -> bool:
+        return await asyncio.to_thread(search_service.delete_search_by_id, user_id, search_id)
+
+    async def toggle_notifications(self, user_id: int, search_id: str) -> Optional[bool]:
+        return await asyncio.to_thread(search_service.toggle_notifications, user_id, search_id)
+
+    async def import_searches(self, user_id: int, searches_data: dict) -> int:
+        return await asyncio.to_thread(search_service.import_user_searches, user_id, searches_data)
+
+    async def cleanup(self, days: int = search_service.MAX_SEARCH_AGE_DAYS) -> int:
+        return await asyncio.to_thread(search_service.cleanup_old_searches, days)
+
+    async def stats(self) -> Tuple[int, int]:
+        return await asyncio.to_thread(search_service.get_storage_stats)
+
+    async def user_ids(self) -> List[str]:
+        return await asyncio.to_thread(search_service.get_all_user_ids)
+
+    async def unique_brands_and_models(self, user_id: int) -> Dict[str, List[str]]:
+        return await asyncio.to_thread(search_service.get_unique_brands_and_models, user_id)
+
+    async def compare_prices_by_model(self, user_id: int, brand: str, model: str) -> Dict[str, Any]:
+        return await asyncio.to_thread(search_service.compare_prices_by_model, user_id, brand, model)
+
+    async def ads_by_model(self, user_id: int, brand: str, model: str, platform: str) -> List[dict]:
+        return await asyncio.to_thread(search_service.get_ads_by_model, user_id, brand, model, platform)
+
+    async def export(self, user_id: int, filename: str, format: str = "json", search_id: str = None) -> str:
+        return await asyncio.to_thread(export_user_searches, user_id, filename, format, search_id)
+
+
+repo = AsyncSearchStorage()
@@ -1,19 +1,46 @@
-import aiohttp
-from bs4 import BeautifulSoup
 import logging
 import re
-import asyncio
-from playwright.async_api import async_playwright
 from datetime import datetime, timedelta
 from transliterate import translit
-import random
+from typing import List, Optional
+from models.listing import Listing, parse_engine, parse_int, parse_mileage
+from services.browser_pool import BrowserPool, browser_pool
+from services.result_cache import result_cache
+from services.circuit_breaker import circuit_breakers
+from services.errors import TransientFetchError
+from services.proxy_pool import ProxyPool, proxy_pool
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+AUTORU_ID_PATTERN = re.compile(r"/(\d+-[\da-f]+)(?:[/?#]|$)")  # Ссылка на объявление: .../bmw/x5/1123456789-1a2b3c4d/
+
+# Извлечение полей объявлений Auto.ru в браузере: один round-trip вместо ~10 на каждое объявление
+LISTING_EXTRACT_JS = """
+items => items.map(el => {
+    const find = (root, sel) => root ? root.querySelector(sel) : null;
+    const text = (root, sel) => { const node = find(root, sel); return node ? node.innerText : null; };
+    const attr = (root, sel, name) => { const node = find(root, sel); return node ? node.getAttribute(name) : null; };
+    const place = el.querySelector('span.MetroListPlace');
+    return {
+        title: text(el, 'a.ListingItemTitle__link'),
+        link: attr(el, 'a.ListingItemTitle__link', 'href'),
+        price: text(el, 'div.ListingItemPrice__content'),
+        year: text(el, 'div.ListingItem__year'),
+        kmage: text(el, 'div.ListingItem__kmAge'),
+        tech: text(el, 'div.ListingItemTechSummaryDesktop'),
+        region: text(place, 'span.MetroListPlace__regionName') || text(el, 'span.MetroListPlace__regionName'),
+        date_text: text(place, 'span.MetroListPlace__content'),
+        image: attr(el, 'img.LazyImage__image', 'src')
+    };
+})
+"""
+
 
 class AutoRuParser:
-    def __init__(self):
+    def __init__(self, browser: Optional[BrowserPool] = None, proxies: Optional[ProxyPool] = None):
+        self.browser = browser or browser_pool
+        self.proxies = proxies or proxy_pool
         self.base_url = "https://auto.ru"
         self.headers = {
             'User-Agent': (
@@ -27,31 +54,30 @@ class AutoRuParser:
 
     async def parse_brands(self) -> list:
         brands = []
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-            await page.goto(f"{self.base_url}/catalog/cars/", timeout=60000)
-            await page.wait_for_selector("div.CatalogFilterSearchList__link-ebL7j", timeout=15000)
-
-            elements = await page.query_selector_all("div.CatalogFilterSearchList__link-ebL7j")
-
-            for element in elements:
-                try:
-                    a_tag = await element.query_selector("a")
-                    if a_tag:
-                        brand_name = (await a_tag.inner_text()).strip()
-                        if brand_name and brand_name.lower() != "все марки":
-                            brands.append(brand_name)
-                except Exception as e:
-                    logger.error(f"Error parsing brand link: {e}")
-
-            await browser.close()
+        catalog_url = f"{self.base_url}/catalog/cars/"
+        async with self.proxies.use("autoru", catalog_url) as proxy:
+            async with self.browser.page("autoru", proxy) as page:
+                await page.goto(catalog_url, timeout=60000)
+                await page.wait_for_selector("div.CatalogFilterSearchList__link-ebL7j", timeout=15000)
+
+                elements = await page.query_selector_all("div.CatalogFilterSearchList__link-ebL7j")
+
+                for element in elements:
+                    try:
+                        a_tag = await element.query_selector("a")
+                        if a_tag:
+                            brand_name = (await a_tag.inner_text()).strip()
+                            if brand_name and brand_name.lower() != "все марки":
+                                brands.append(brand_name)
+                    except Exception as e:
+                        logger.error(f"Error parsing brand link: {e}")
 
         unique_brands = sorted(set(brands))
         logger.info(f"✅ Найдено марок на Auto.ru: {len(unique_brands)}")
         return unique_brands
 
-    async def parse_ads(self, brand: str, city: str, min_price: int, max_price: int, radius: int = 200) -> list:
+    def generate_url(self, brand: str, city: str, min_price: int, max_price: int, radius: int = 200) -> str:
+        """Ссылка на выдачу Auto.ru: свежие объявления за сутки"""
         city_translit = translit(city.lower(), 'ru', reversed=True)
         city_slug = city_translit.replace(" ", "_")  # Replace spaces with underscores
         brand_slug = brand.lower().replace(" ", "_")
@@ -68,88 +94,77 @@ class AutoRuParser:
 
         full_url = f"{url}?{query_params}"
         logger.info(f"🌐 Сформированная ссылка для запроса: {full_url}")
+        return full_url
 
-        await asyncio.sleep(random.uniform(0.5, 1.5))
-
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-            try:
-                await page.goto(full_url, timeout=60000)
-                await page.wait_for_selector('div.ListingItem', timeout=15000)
-            except Exception as e:
-                logger.error(f"Ошибка загрузки объявлений: {e}")
-                await browser.close()
-                return []
-
-            car_elements = await page.query_selector_all('div.ListingItem')
-            ads = []
+    async def parse_ads(self, brand: str, city: str, min_price: int, max_price: int, radius: int = 200) -> List[Listing]:
+        full_url = self.generate_url(brand, city, min_price, max_price, radius)
+        # Свежая выдача берётся из кэша, одинаковые одновременные запросы открывают одну страницу браузера
+        return await result_cache.fetch("autoru", full_url, lambda: self._parse_listing(full_url))
 
-            for el in car_elements:
+    async def _parse_listing(self, full_url: str) -> List[Listing]:
+        """Загружает страницу выдачи в браузере и собирает объявления"""
+        async with circuit_breakers.guard("autoru"), self.proxies.use("autoru", full_url) as proxy:
+            async with self.browser.page("autoru", proxy) as page:
+                try:
+                    await page.goto(full_url, timeout=60000)
+                except Exception as e:
+                    logger.error(f"Ошибка загрузки объявлений: {e}")
+                    raise TransientFetchError("autoru", str(e))
                 try:
-                    # Check for distance in address
-                    place_el = await el.query_selector('span.MetroListPlace__regionName')
-                    if place_el:
-                        location_text = await place_el.inner_text()
-                        if "км от" in location_text:
-                            continue
-
-                    # Get title and link
-                    title_el = await el.query_selector('a.ListingItemTitle__link')
-                    title = await title_el.inner_text() if title_el else "Без названия"
-                    link = await title_el.get_attribute('href') if title_el else None
-                    
-                    # Get price
-                    price_el = await el.query_selector('div.ListingItemPrice__content')
-                    price = await price_el.inner_text() if price_el else "Без цены"
-                    price = re.sub(r'[^\d]', '', price)
-                    
-                    # Get year
-                    year_el = await el.query_selector('div.ListingItem__year')
-                    year = await year_el.inner_text() if year_el else ""
-                    
-                    # Get mileage
-                    kmage_el = await el.query_selector('div.ListingItem__kmAge')
-                    kmage = await kmage_el.inner_text() if kmage_el else ""
-                    
-                    # Get location and date
-                    place_el = await el.query_selector('span.MetroListPlace')
-                    location = ""
-                    date_text = ""
-                    if place_el:
-                        region_el = await place_el.query_selector('span.MetroListPlace__regionName')
-                        location = await region_el.inner_text() if region_el else ""
-                        
-                        content_el = await place_el.query_selector('span.MetroListPlace__content')
-                        date_text = await content_el.inner_text() if content_el else ""
-                    
-                    # Get image
-                    img_el = await el.query_selector('img.LazyImage__image')
-                    image_url = await img_el.get_attribute('src') if img_el else ""
-                    
-                    if link and not link.startswith("http"):
-                        link = self.base_url + link
-                    
-                    date = self._parse_date(date_text.strip()) if date_text else "Не указана"
-                    
-                    ads.append({
-                        'id': link.split('/')[-2] if link else "",
-                        'title': title.strip(),
-                        'price': int(price) if price.isdigit() else 0,
-                        'year': int(year) if year and year.isdigit() else 0,
-                        'kmage': kmage.strip().replace('\xa0', ' ') if kmage else "",
-                        'date': date,
-                        'address': location.strip(),
-                        'url': link,
-                        'image_url': image_url,
-                        'source': 'autoru'
-                    })
+                    await page.wait_for_selector('div.ListingItem', timeout=15000)
                 except Exception as e:
-                    logger.error(f"Ошибка парсинга одного объявления: {e}")
+                    # Страница открылась, но объявлений на ней нет
+                    logger.warning(f"Объявления не найдены: {e}")
+                    return []
+
+                # Все объявления страницы собираем одним вызовом на стороне браузера
+                records = await page.eval_on_selector_all('div.ListingItem', LISTING_EXTRACT_JS)
+
+        ads: List[Listing] = []
+        for record in records:
+            try:
+                ad = self._normalize_listing(record)
+                if ad:
+                    ads.append(ad)
+            except Exception as e:
+                logger.error(f"Ошибка парсинга одного объявления: {e}")
+
+        return ads
+
+    def _normalize_listing(self, record: dict) -> Optional[Listing]:
+        """Приводит сырую запись со страницы к формату объявления, None — объявление не подходит"""
+        location = record.get('region') or ""
+        # Объявления из соседних городов («N км от ...») пропускаем
+        if "км от" in location:
+            return None
+
+        title = record.get('title')
+        link = record.get('link')
+        if link and not link.startswith("http"):
+            link = self.base_url + link
+
+        if not link:
+            return None
+        date_text = (record.get('date_text') or "").strip()
+        # Характеристики: «2.0 л / 249 л.с. / Бензин»
+        engine_volume, engine_power = parse_engine(record.get('tech'))
+        ad_id = AUTORU_ID_PATTERN.search(link)
+
+        return Listing(
+            source="autoru",
+            id=ad_id.group(1) if ad_id else link,
+            title=title.strip() if title is not None else "Без названия",
+            url=link,
+            price=parse_int(record.get('price')),
+            year=parse_int(record.get('year')),
+            mileage=parse_mileage(record.get('kmage')),
+            engine_volume=engine_volume,
+            engine_power=engine_power,
+            address=location.strip() or "Не указано",
+            date=self._parse_date(date_text) if date_text else "Не указана",
+            image_url=record.get('image') or ""
+        )
 
-            await browser.close()
-            return ads
-                  
     def _parse_date(self, date_text: str) -> str:
         today = datetime.now()
 
@@ -1,84 +1,142 @@
 import asyncio
-import random
 import logging
-from aiohttp import ClientSession
-from bs4 import BeautifulSoup
-from typing import List, Optional
+import aiohttp
+from typing import Collection, List, Optional
 from config.settings import settings
-from models.data_models import Advertisement
+from models.listing import Listing, parse_engine, parse_int, parse_mileage, parse_year
 from utils.utils import normalize_city_name
-from storage.cities import locations_dict
+from storage.city_index import city_index
+from services.http_client import HttpClient, http_client
+from services.result_cache import result_cache
+from services.page_fingerprint import page_fingerprints
+from services.html_backend import Only, parse_html
+from services.crawler import crawl_pages
+from services.rate_limiter import rate_limiter, backoff_delay
+from services.errors import FetchError, BlockedError, CaptchaError, TransientFetchError
+from services.circuit_breaker import circuit_breakers
+from services.proxy_pool import Proxy, ProxyPool, proxy_pool
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
-class Advertisement:
-    def __init__(self, id=None, title=None, price=None, address=None, url=None, date=None, **kwargs):
-        self.id = id
-        self.title = title
-        self.price = price
-        self.address = address
-        self.url = url
-        self.date = date
-        # Игнорируем дополнительные параметры, которые могут прийти от Avito
-        self.location = kwargs.get('location')  # Добавляем поддержку location
+# Какие узлы страницы разбирать (остальное пропускается при построении дерева)
+LISTING_NODES = ("div", {"data-marker": "item"})
+BRANDS_NODES = ("div", {"class": "popular-rubricator-row-Q5kSL"})
+
+# Признаки страниц, которые Avito отдаёт вместо выдачи
+AVITO_CAPTCHA_MARKERS = ("js-firewall-form", "firewall-title", "Подтвердите, что вы не робот")
+AVITO_BLOCK_MARKERS = ("Доступ ограничен", "проблема с IP")
+AVITO_EMPTY_MARKERS = ("Ничего не найдено", 'data-marker="page-title/empty"')
+
+
+def classify_avito_response(status: int, html: str) -> str:
+    """
+    Что пришло в ответ: "ok" — выдача, "empty" — выдача без объявлений,
+    "captcha", "blocked" — повтор не поможет, "transient" — стоит повторить.
+    """
+    if status == 429 or status >= 500:
+        return "transient"
+    # Карточки объявлений есть — это выдача, даже если где-то в скриптах встречается слово captcha
+    if status == 200 and 'data-marker="item"' in html:
+        return "ok"
+    if any(marker in html for marker in AVITO_CAPTCHA_MARKERS):
+        return "captcha"
+    if status == 403 or any(marker in html for marker in AVITO_BLOCK_MARKERS):
+        return "blocked"
+    if status == 404 or any(marker in html for marker in AVITO_EMPTY_MARKERS):
+        return "empty"
+    if status >= 400:
+        return "blocked"
+    return "empty"
+
 
 class AvitoParser:
-    def __init__(self) -> None:
-        self.current_user_agent: int = 0
+    def __init__(self, http: Optional[HttpClient] = None, proxies: Optional[ProxyPool] = None) -> None:
+        self.http = http or http_client
+        self.proxies = proxies or proxy_pool
         self.headers: dict = {
             "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
             "Referer": "https://www.avito.ru/"
         }
         self.allowed_time = ['часов', 'часа', 'час', 'минут', 'минуту', 'минуты', 'секунд']
 
-    async def fetch_html(self, url: str, retry_count: int = 8) -> Optional[str]:
+    async def fetch_html(self, url: str, retry_count: int = settings.FETCH_RETRY_COUNT) -> str:
+        """
+        Загружает страницу Avito. Блокировка и капча сразу поднимают BlockedError / CaptchaError,
+        временные ошибки повторяются с нарастающей задержкой, после последней попытки — TransientFetchError.
+        Если забанен только выход, следующая попытка сразу идёт через другой прокси из пула.
+        Результат (вместе с повторами) учитывается выключателем площадки.
+        """
+        async with circuit_breakers.guard("avito"):
+            return await self._fetch_html(url, retry_count)
+
+    async def _fetch_html(self, url: str, retry_count: int) -> str:
         logger.info(f"Начинаю загрузку страницы: {url}")
+        error: FetchError = TransientFetchError("avito", "нет попыток")
+        proxy: Optional[Proxy] = None
         for attempt in range(retry_count):
             try:
-                await asyncio.sleep(random.uniform(1, 3))
-                self.headers["User-Agent"] = settings.USER_AGENTS[self.current_user_agent]
-                self.current_user_agent = (self.current_user_agent + 1) % len(settings.USER_AGENTS)
+                async with self.proxies.use("avito", url) as proxy:
+                    return await self._request(url, proxy, attempt)
+            except (BlockedError, CaptchaError) as e:
+                # Бан привязан к IP: пока в пуле есть другие незабаненные выходы, пробуем их без задержки
+                if not self.proxies.available("avito", exclude=proxy):
+                    raise
+                logger.warning(f"Попытка {attempt + 1}: {e}, переключаемся на другой прокси")
+                error = e
+                continue
+            except TransientFetchError as e:
+                error = e
 
-                logger.info(f"Попытка {attempt + 1}: Загружаем {url} с User-Agent: {self.headers['User-Agent']}")
+            logger.error(f"Ошибка при загрузке страницы (попытка {attempt + 1}): {error}")
+            if attempt < retry_count - 1:
+                await asyncio.sleep(backoff_delay(attempt))
 
-                async with ClientSession() as session:
-                    async with session.get(url, headers=self.headers, timeout=30) as response:
-                        if response.status == 429:
-                            retry_after = int(response.headers.get('Retry-After', 10))
-                            logger.warning(f"Достигнут лимит запросов! Ожидание {retry_after} секунд перед повторной попыткой.")
-                            await asyncio.sleep(retry_after)
-                            continue
+        logger.critical(f"Не удалось загрузить {url} после {retry_count} попыток.")
+        raise error
 
-                        response.raise_for_status()
-                        logger.info(f"Успешно загружено: {url} (Статус {response.status})")
-                        return await response.text()
+    async def _request(self, url: str, proxy: Proxy, attempt: int) -> str:
+        """Один запрос через выход proxy с его User-Agent и куками; ответ без выдачи — типизированная ошибка"""
+        logger.info(f"Попытка {attempt + 1}: Загружаем {url} через {proxy.name}")
+        try:
+            async with self.http.session_for(proxy).get(
+                url, headers={**self.headers, "User-Agent": proxy.user_agent}, proxy=proxy.url
+            ) as response:
+                status = response.status
+                retry_after = response.headers.get('Retry-After', '')
+                html = await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise TransientFetchError("avito", f"ошибка сети: {e}")
 
-            except Exception as e:
-                logger.error(f"Ошибка при загрузке страницы (попытка {attempt + 1}): {str(e)}")
-                if attempt == retry_count - 1:
-                    logger.critical(f"Не удалось загрузить {url} после {retry_count} попыток.")
-                    return None
-                await asyncio.sleep(5 * (attempt + 1))
+        kind = classify_avito_response(status, html)
+        if kind in ("ok", "empty"):
+            logger.info(f"Успешно загружено: {url} (Статус {status}, {kind})")
+            return html
+        if kind == "blocked":
+            raise BlockedError("avito", f"HTTP {status}, доступ ограничен для {proxy.name}")
+        if kind == "captcha":
+            raise CaptchaError("avito", f"HTTP {status}, капча для {proxy.name}")
 
-        return None
+        if status == 429:
+            retry_after = int(retry_after) if retry_after.isdigit() else 10
+            logger.warning(f"Достигнут лимит запросов! Ожидание {retry_after} секунд перед повторной попыткой.")
+            # Пауза общая для всех запросов к Avito через этот выход, а не только для этой попытки
+            rate_limiter.pause(url, retry_after, proxy.name)
+        raise TransientFetchError("avito", f"HTTP {status}")
 
     async def get_location_id_by_city_name(self, city_name: str) -> Optional[int]:
-        """Ищет locationId по названию города в locations_dict."""
+        """Ищет locationId по названию города в индексе locations_dict."""
         normalized_name = normalize_city_name(city_name)
         logger.info(f"Поиск locationId для: {normalized_name}")
 
         # Сначала ищем полное совпадение
-        for path, loc_id in locations_dict.items():
-            if normalized_name == path:
-                return loc_id
+        loc_id = city_index.location_id(normalized_name)
+        if loc_id is not None:
+            return loc_id
 
         # Если нет полного совпадения, ищем частичное совпадение по названию города
-        possible_matches = []
-        for path, loc_id in locations_dict.items():
-            if normalized_name in path.split("_"):
-                possible_matches.append((path, loc_id))
+        possible_matches = city_index.by_token(normalized_name)
 
         if len(possible_matches) == 1:
             logger.info(f"Найдено совпадение: {possible_matches[0][0]}")
@@ -94,58 +152,86 @@ class AvitoParser:
         return None
 
     def get_url_path_by_location_id(self, location_id: int) -> Optional[str]:
-        for path, loc_id in locations_dict.items():
-            if loc_id == location_id:
-                return path
-        return None
+        return city_index.path(location_id)
 
     async def parse_brands(self, html: str) -> List[str]:
         logger.info("Парсинг популярных брендов...")
-        soup = BeautifulSoup(html, 'html.parser')
-        brands = [link['title'].strip() for link in
-                  soup.select('div.popular-rubricator-row-Q5kSL a[data-marker="popular-rubricator/link"]')
-                  if link.get('title')]
+        root = parse_html(html, only=BRANDS_NODES)
+        brands = [link.attr('title').strip() for link in
+                  root.select('div.popular-rubricator-row-Q5kSL a[data-marker="popular-rubricator/link"]')
+                  if link.attr('title')]
         logger.info(f"Найдено {len(brands)} брендов.")
         return brands
 
     async def parse_ads(self, brand: str, city: str, radius_km: int = 0,
-                    min_price: int = 0, max_price: int = 0) -> List[Advertisement]:
+                    min_price: int = 0, max_price: int = 0, max_pages: Optional[int] = None,
+                    known: Collection[str] = ()) -> List[Listing]:
         url = await self.generate_url(brand, city, min_price, max_price, radius_km)
         if not url:
             return []
 
+        return await crawl_pages(
+            lambda page: self._fetch_page(url, page),
+            key=lambda ad: ad.id,
+            max_pages=max_pages or settings.CRAWL_MAX_PAGES["avito"],
+            concurrency=settings.CRAWL_CONCURRENT_PAGES,
+            known=known
+        )
+
+    async def _fetch_page(self, url: str, page: int) -> List[Listing]:
+        page_url = url if page == 1 else f"{url}&p={page}"
+        # Свежая выдача берётся из кэша, одинаковые одновременные запросы выполняются один раз
+        return await result_cache.fetch("avito", page_url, lambda: self._parse_listing(page_url))
+
+    async def _parse_listing(self, url: str) -> List[Listing]:
+        """Загружает страницу выдачи и разбирает её, если она изменилась с прошлой загрузки"""
         html = await self.fetch_html(url)
         if not html:
             return []
 
-        soup = BeautifulSoup(html, 'html.parser')
-        ads: List[Advertisement] = []
+        return page_fingerprints.parse("avito", url, html, self._parse_html)
+
+    def _parse_html(self, html: str, backend: Optional[str] = None, only: Only = LISTING_NODES) -> List[Listing]:
+        """Объявления страницы выдачи; backend и only — для замеров (benchmarks/parse_backends.py)"""
+        root = parse_html(html, only=only, backend=backend)
+        ads: List[Listing] = []
 
-        for item in soup.select('div[data-marker="item"]'):
+        for item in root.select('div[data-marker="item"]'):
             try:
                 link = item.select_one('a[data-marker="item-title"]')
                 if not link:
                     continue
 
-                title = link.get('title', '').strip()
-                url = f"https://www.avito.ru{link.get('href', '')}"
+                title = link.attr('title', '').strip()
+                url = f"https://www.avito.ru{link.attr('href', '')}"
                 price_element = item.select_one('meta[itemprop="price"]')
-                price = f"{price_element['content']} ₽" if price_element else "Не указана"
+                price = parse_int(price_element.attr('content')) if price_element else None
 
                 time_element = item.select_one('[data-marker="item-date"]')
-                time = time_element.text.strip() if time_element else "Не указано"
+                time = time_element.text().strip() if time_element else "Не указано"
                 
                 # Extract location
                 location_element = item.select_one('.geo-root-NrkbV span.styles-module-noAccent-XIvJm')
-                location = location_element.text.strip() if location_element else "Не указано"
+                location = location_element.text().strip() if location_element else "Не указано"
 
                 if any(word in time.lower() for word in self.allowed_time):
-                    ads.append(Advertisement(
+                    # Заголовок Avito: «BMW X5 3.0 AT, 2015, 150 000 км»,
+                    # характеристики: «150 000 км, 3.0 AT (249 л.с.), внедорожник, 4WD, дизель»
+                    params_element = item.select_one('[data-marker="item-specific-params"]')
+                    params = params_element.text() if params_element else ""
+                    engine_volume, engine_power = parse_engine(params or title)
+                    ads.append(Listing(
+                        source="avito",
+                        id=item.attr('data-item-id') or url,
                         title=title,
                         url=url,
                         price=price,
-                        date=time,
-                        location=location  # Make sure your Advertisement model has this field
+                        year=parse_year(title),
+                        mileage=parse_mileage(title) or parse_mileage(params),
+                        engine_volume=engine_volume,
+                        engine_power=engine_power,
+                        address=location,
+                        date=time
                     ))
             except Exception as e:
                 logger.error(f"Error parsing ad: {e}")
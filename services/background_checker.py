@@ -1,21 +1,79 @@
 import asyncio
+import time
 from aiogram import Bot
-from services.search_service import SearchService
+from config.settings import settings
+from services import search_service
 from services.avito_parser import AvitoParser
 from services.drom_parser import DromParser
+from services.autoru_parser import AutoRuParser
+from models.listing import Listing
 import logging
-from typing import Dict, List
-from datetime import datetime
+from collections import defaultdict
+from typing import Collection, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+
+def query_key(platform: str, params: Dict) -> Tuple:
+    """
+    Канонический ключ запроса к площадке: те же входные данные, из которых строится URL выдачи.
+    Поиски с одинаковым ключом разных пользователей дают одну и ту же выдачу.
+    """
+    return (
+        platform,
+        str(params.get("brand") or "").strip().lower(),
+        str(params.get("region") or "").strip().lower(),
+        int(params.get("radius") or 0),
+        int(params.get("min_price") or 0),
+        int(params.get("max_price") or 0),
+        int(params.get("pages") or 0),
+        int(params.get("distance") or 0),
+        str(params.get("city_link") or "")
+    )
+
+
+class SweepStats:
+    """Счётчики одного прохода проверки"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.errors = 0
+        self.new_ads = 0
+        self.unchanged = 0  # Поиски, у которых выдача не изменилась с прошлой проверки
+        self.started = time.monotonic()
+        self._next_report = 0.1
+
+    def step(self):
+        self.done += 1
+        # Прогресс пишем каждые 10% запросов
+        if self.total and self.done / self.total >= self._next_report:
+            logger.info(
+                f"Фоновая проверка: {self.done}/{self.total} запросов, "
+                f"{time.monotonic() - self.started:.1f} с"
+            )
+            while self._next_report <= self.done / self.total:
+                self._next_report += 0.1
+
+
 class BackgroundChecker:
-    def __init__(self, bot: Bot, interval: int = 600):
+    """
+    Периодически проверяет сохранённые поиски с включёнными уведомлениями и присылает новые объявления.
+    Поиски проверяются параллельно, у каждой платформы свой лимит одновременных запросов.
+    Одинаковые поиски разных пользователей объединяются: выдача загружается один раз на запрос.
+    """
+
+    def __init__(self, bot: Bot, interval: int = settings.BACKGROUND_CHECK_INTERVAL,
+                 concurrency: Optional[Dict[str, int]] = None):
         self.bot = bot
         self.interval = interval
-        self.search_service = SearchService()
+        concurrency = concurrency or settings.BACKGROUND_CHECK_CONCURRENCY
+        self.semaphores = {platform: asyncio.Semaphore(limit) for platform, limit in concurrency.items()}
         self.avito_parser = AvitoParser()
         self.drom_parser = DromParser()
+        self.autoru_parser = AutoRuParser()
+        # search_id -> отпечаток выдачи, с которой поиск сравнивался в прошлый раз
+        self._seen: Dict[str, int] = {}
 
     async def start(self):
         while True:
@@ -26,69 +84,115 @@ class BackgroundChecker:
             await asyncio.sleep(self.interval)
 
     async def _check_all_searches(self):
-        searches = self.search_service._load_all()
-        
-        for user_id, user_searches in searches.items():
-            for search in user_searches:
-                if not search["notifications"]:
-                    continue
-                
-                new_ads = await self._check_search(search)
-                if new_ads:
-                    await self._notify_user(user_id, new_ads, search)
+        searches = await asyncio.to_thread(search_service.get_searches_to_check)
+        active_ids = {search['id'] for search in searches}
+        self._seen = {search_id: seen for search_id, seen in self._seen.items() if search_id in active_ids}
+
+        # Одинаковые поиски разных пользователей загружаем один раз
+        groups: Dict[Tuple, List[Dict]] = defaultdict(list)
+        for search in searches:
+            if search['platform'] in self.semaphores:
+                groups[query_key(search['platform'], search['params'])].append(search)
+
+        stats = SweepStats(len(groups))
+        subscribers = sum(len(group) for group in groups.values())
+        logger.info(f"Фоновая проверка: начат проход по {stats.total} запросам ({subscribers} поисков)")
+
+        await asyncio.gather(*(self._check_group(group, stats) for group in groups.values()))
+
+        logger.info(
+            f"Фоновая проверка завершена за {time.monotonic() - stats.started:.1f} с: "
+            f"запросов {stats.done}, поисков {subscribers}, новых объявлений {stats.new_ads}, "
+            f"без изменений {stats.unchanged}, ошибок {stats.errors}"
+        )
 
-    async def _check_search(self, search: Dict) -> List[Dict]:
-        platform = search["platform"]
-        params = search["params"]
-        
+    async def _check_group(self, group: List[Dict], stats: SweepStats):
+        """Одна загрузка выдачи на группу одинаковых поисков, новые объявления — каждому подписчику"""
+        first = group[0]
+        # Объявления, которые уже видели все подписчики: на странице только из них обход останавливается
+        known = set.intersection(*(set(search['last_result_ids']) for search in group))
         try:
-            if platform == "avito":
-                ads = await self.avito_parser.parse_ads(
-                    brand=params.get("brand"),
-                    city=params.get("city"),
-                    radius_km=params.get("radius", 200),
-                    min_price=params.get("min_price"),
-                    max_price=params.get("max_price"),
-                    min_year=params.get("min_year"),
-                    max_year=params.get("max_year")
-                )
-            elif platform == "drom":
-                ads = await self.drom_parser.parse_ads_drom(
-                    brand=params.get("brand"),
-                    city=params.get("city"),
-                    radius_km=params.get("radius", 200),
-                    min_price=params.get("min_price"),
-                    max_price=params.get("max_price"),
-                    min_year=params.get("min_year"),
-                    max_year=params.get("max_year")
-                )
-            else:
-                return []
-            
-            last_ids = {ad["id"] for ad in search["last_results"]}
-            new_ads = [ad for ad in ads if ad["id"] not in last_ids]
-            
-            if new_ads:
-                self.search_service.update_search_results(
-                    search["id"],
-                    ads[:50]  # Сохраняем только последние 50 объявлений
-                )
-            
-            return new_ads
+            async with self.semaphores[first['platform']]:
+                ads = await self._fetch(first['platform'], first['params'], known)
         except Exception as e:
-            logger.error(f"Ошибка проверки поиска {search['id']}: {e}")
-            return []
+            stats.errors += 1
+            logger.error(f"Ошибка проверки запроса {query_key(first['platform'], first['params'])}: {e}")
+            stats.step()
+            return
 
-    async def _notify_user(self, user_id: str, ads: List[Dict], search: Dict):
+        # Отпечаток выдачи: если поиск уже сравнивался с таким же набором объявлений, сравнение не нужно
+        fingerprint = hash(frozenset(ad.id for ad in ads))
+        for search in group:
+            if self._seen.get(search['id']) == fingerprint:
+                stats.unchanged += 1
+                continue
+            try:
+                new_ads = await self._check_search(search, ads)
+                self._seen[search['id']] = fingerprint
+                if new_ads:
+                    stats.new_ads += len(new_ads)
+                    await self._notify_user(search['user_id'], new_ads, search)
+            except Exception as e:
+                stats.errors += 1
+                logger.error(f"Ошибка проверки поиска {search['id']}: {e}")
+        stats.step()
+
+    async def _fetch(self, platform: str, params: Dict, known: Collection[str] = ()) -> List[Listing]:
+        """Загружает свежую выдачу по параметрам сохранённого поиска, known — ID уже виденных объявлений"""
+        if platform == "avito":
+            return await self.avito_parser.parse_ads(
+                brand=params.get("brand"),
+                city=params.get("region"),
+                radius_km=params.get("radius", 0),
+                min_price=params.get("min_price", 0),
+                max_price=params.get("max_price", 0),
+                max_pages=params.get("pages"),
+                known=known
+            )
+        elif platform == "drom":
+            return await self.drom_parser.parse_ads(
+                brand=params.get("brand"),
+                city=params.get("region"),
+                distance=params.get("distance", params.get("radius", 0)),
+                min_price=params.get("min_price", 0),
+                max_price=params.get("max_price", 0),
+                city_link=params.get("city_link"),
+                max_pages=params.get("pages"),
+                known=known
+            )
+        elif platform == "autoru":
+            return await self.autoru_parser.parse_ads(
+                brand=params.get("brand"),
+                city=params.get("region"),
+                min_price=params.get("min_price", 0),
+                max_price=params.get("max_price", 0),
+                radius=params.get("radius", 200)
+            )
+        return []
+
+    async def _check_search(self, search: Dict, ads: List[Listing]) -> List[Listing]:
+        """Сравнивает свежую выдачу с последними результатами поиска и добавляет её к ним, если есть новые"""
+        last_ids = set(search["last_result_ids"])
+        # Старые поиски Avito и Drom хранят ссылку вместо ID объявления
+        new_ads = [ad for ad in ads if ad.id not in last_ids and ad.url not in last_ids]
+
+        if new_ads:
+            await asyncio.to_thread(
+                search_service.update_search_results, search["user_id"], search["id"], [ad.to_dict() for ad in ads]
+            )
+
+        return new_ads
+
+    async def _notify_user(self, user_id: str, ads: List[Listing], search: Dict):
         message = f"🔔 Новые объявления по вашему поиску:\n\n"
         for ad in ads[:5]:  # Ограничиваем 5 объявлениями в уведомлении
             message += (
-                f"{ad['title']}\n"
-                f"Цена: {ad['price']}\n"
-                f"Год: {ad.get('year', '—')}\n"
-                f"Ссылка: {ad['link']}\n\n"
+                f"{ad.title}\n"
+                f"Цена: {ad.price_text}\n"
+                f"Год: {ad.year or '—'}\n"
+                f"Ссылка: {ad.url}\n\n"
             )
-        
+
         try:
             await self.bot.send_message(
                 chat_id=user_id,
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from config.settings import settings
+from services.avito_parser import AvitoParser
+from services.drom_parser import DromParser
+from services.autoru_parser import AutoRuParser
+
+logger = logging.getLogger(__name__)
+
+# Константы
+BRAND_CACHE_PATH = Path("storage/brands_cache.json")
+
+
+async def fetch_avito_brands() -> List[str]:
+    parser = AvitoParser()
+    html = await parser.fetch_html("https://www.avito.ru/moskva/avtomobili")
+    return await parser.parse_brands(html) if html else []
+
+
+async def fetch_drom_brands() -> List[str]:
+    return await DromParser().parse_brands_drom()
+
+
+async def fetch_autoru_brands() -> List[str]:
+    return await AutoRuParser().parse_brands()
+
+
+BRAND_FETCHERS: Dict[str, Callable[[], Awaitable[List[str]]]] = {
+    "avito": fetch_avito_brands,
+    "drom": fetch_drom_brands,
+    "autoru": fetch_autoru_brands
+}
+
+
+class BrandCatalogue:
+    """
+    Кэш списков марок по платформам, сохраняется на диск.
+    Устаревший список отдаётся сразу, а обновление идёт в фоне (stale-while-revalidate).
+    """
+
+    def __init__(
+        self,
+        path: Path = BRAND_CACHE_PATH,
+        ttl: int = settings.BRAND_CACHE_TTL,
+        fetchers: Optional[Dict[str, Callable[[], Awaitable[List[str]]]]] = None
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.fetchers = fetchers or BRAND_FETCHERS
+        self._data: Dict[str, dict] = self._load()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            if self.path.exists():
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.error(f"Ошибка загрузки кэша марок {self.path}: {e}")
+        return {}
+
+    def _save(self, data: Dict[str, dict]):
+        """Атомарная запись: во временный файл и переименование"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def is_stale(self, platform: str) -> bool:
+        entry = self._data.get(platform)
+        return not entry or time.time() - entry.get('updated_at', 0) > self.ttl
+
+    async def get(self, platform: str) -> List[str]:
+        """Возвращает марки платформы; ждать сети приходится только если кэша ещё нет"""
+        entry = self._data.get(platform)
+        if entry and entry.get('brands'):
+            if self.is_stale(platform):
+                self._refresh_in_background(platform)
+            return entry['brands']
+        return await self.refresh(platform)
+
+    def _refresh_in_background(self, platform: str) -> asyncio.Task:
+        task = self._refreshing.get(platform)
+        if task is None or task.done():
+            task = asyncio.create_task(self._refresh(platform))
+            self._refreshing[platform] = task
+        return task
+
+    async def refresh(self, platform: str) -> List[str]:
+        """Обновляет марки платформы; параллельные вызовы ждут одно и то же обновление"""
+        return await asyncio.shield(self._refresh_in_background(platform))
+
+    async def _refresh(self, platform: str) -> List[str]:
+        old_brands = self._data.get(platform, {}).get('brands', [])
+        try:
+            brands = await self.fetchers[platform]()
+        except Exception as e:
+            logger.error(f"Не удалось обновить марки {platform}: {e}")
+            return old_brands
+
+        if not brands:
+            logger.warning(f"Пустой список марок {platform}, оставляю прежний")
+            return old_brands
+
+        self._data[platform] = {'brands': brands, 'updated_at': time.time()}
+        try:
+            await asyncio.to_thread(self._save, dict(self._data))
+        except Exception as e:
+            logger.error(f"Ошибка сохранения кэша марок: {e}")
+        logger.info(f"Обновлены марки {platform}: {len(brands)}")
+        return brands
+
+    async def run(self, check_interval: int = settings.BRAND_REFRESH_CHECK_INTERVAL):
+        """Фоновая задача: периодически обновляет устаревшие списки марок"""
+        while True:
+            for platform in self.fetchers:
+                if self.is_stale(platform):
+                    await self.refresh(platform)
+            await asyncio.sleep(check_interval)
+
+
+brand_catalogue = BrandCatalogue()
@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, TYPE_CHECKING
+from urllib.parse import urlsplit
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright, Route, Request
+
+from config.settings import settings
+
+if TYPE_CHECKING:
+    from services.proxy_pool import Proxy
+
+logger = logging.getLogger(__name__)
+
+
+# Примерный размер ресурсов, которые мы не загрузили: точный размер отменённого запроса неизвестен
+AVERAGE_RESOURCE_BYTES = {
+    'image': 60_000,
+    'media': 500_000,
+    'font': 40_000,
+    'stylesheet': 30_000,
+    'script': 50_000,
+    'xhr': 5_000,
+    'fetch': 5_000
+}
+
+
+class RequestPolicy:
+    """Какие запросы страницы отменять: по типу ресурса и по домену (вместе с поддоменами)"""
+
+    def __init__(self, resource_types: List[str], domains: List[str]):
+        self.resource_types = frozenset(resource_types)
+        self.domains = tuple(domains)
+
+    @classmethod
+    def for_platform(cls, platform: Optional[str]) -> Optional['RequestPolicy']:
+        config = settings.BROWSER_BLOCKED_REQUESTS.get(platform) if platform else None
+        if not config:
+            return None
+        return cls(config.get('resource_types', []), config.get('domains', []))
+
+    def should_block(self, request: Request) -> bool:
+        if request.resource_type in self.resource_types:
+            return True
+        host = urlsplit(request.url).hostname or ""
+        return any(host == domain or host.endswith("." + domain) for domain in self.domains)
+
+
+class NavigationStats:
+    """Сколько запросов отменено и сколько байт реально загружено за одну выдачу страницы"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.blocked: Dict[str, int] = {}
+        self.bytes_loaded = 0
+
+    @property
+    def blocked_total(self) -> int:
+        return sum(self.blocked.values())
+
+    @property
+    def bytes_saved(self) -> int:
+        return sum(AVERAGE_RESOURCE_BYTES.get(kind, 10_000) * count for kind, count in self.blocked.items())
+
+    @property
+    def seconds(self) -> float:
+        return time.monotonic() - self.started
+
+
+class _PooledPage:
+    """Контекст браузера с одной страницей, счётчиком переходов и политикой блокировки запросов"""
+
+    def __init__(self, context: BrowserContext, page: Page, exit_name: Optional[str]):
+        self.context = context
+        self.page = page
+        self.exit_name = exit_name  # Через какой прокси ходит контекст (None — без пула прокси)
+        self.navigations = 0
+        self.policy: Optional[RequestPolicy] = None
+        self.stats = NavigationStats()
+        page.on("framenavigated", self._on_navigated)
+        page.on("response", self._on_response)
+
+    async def install_routes(self):
+        await self.page.route("**/*", self._on_route)
+
+    def _on_navigated(self, frame):
+        if frame == self.page.main_frame:
+            self.navigations += 1
+
+    def _on_response(self, response):
+        length = response.headers.get("content-length")
+        if length and length.isdigit():
+            self.stats.bytes_loaded += int(length)
+
+    async def _on_route(self, route: Route, request: Request):
+        if self.policy is not None and self.policy.should_block(request):
+            kind = request.resource_type
+            self.stats.blocked[kind] = self.stats.blocked.get(kind, 0) + 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def close(self):
+        try:
+            await self.context.close()
+        except Exception as e:
+            logger.warning(f"Ошибка при закрытии контекста браузера: {e}")
+
+
+class BrowserPool:
+    """
+    Один долгоживущий Chromium на процесс и ограниченный пул контекстов со страницами.
+    Контекст пересоздаётся после max_navigations переходов, одновременно работает не больше max_contexts страниц.
+    Контексты привязаны к выходу из пула прокси: у каждого свои прокси, User-Agent и куки.
+    """
+
+    def __init__(
+        self,
+        max_contexts: int = settings.BROWSER_MAX_CONTEXTS,
+        max_navigations: int = settings.BROWSER_CONTEXT_MAX_NAVIGATIONS,
+        headless: bool = settings.BROWSER_HEADLESS
+    ):
+        self.max_contexts = max_contexts
+        self.max_navigations = max_navigations
+        self.headless = headless
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._idle: Dict[Optional[str], List[_PooledPage]] = {}
+        self._semaphore = asyncio.Semaphore(max_contexts)
+        self._start_lock = asyncio.Lock()
+        # Накопленная статистика по платформам: переходы, отменённые запросы, байты, время
+        self.totals: Dict[str, Dict[str, float]] = {}
+
+    async def start(self):
+        """Запускает браузер, если он ещё не запущен или упал"""
+        async with self._start_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=self.headless)
+            self._idle.clear()
+            logger.info(f"Браузер запущен (контекстов: {self.max_contexts}, переходов на контекст: {self.max_navigations})")
+
+    async def close(self):
+        """Закрывает все контексты и браузер (при остановке бота)"""
+        async with self._start_lock:
+            for idle in self._idle.values():
+                for pooled in idle:
+                    await pooled.close()
+            self._idle.clear()
+            if self._browser is not None:
+                await self._browser.close()
+                self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    @asynccontextmanager
+    async def page(self, platform: Optional[str] = None, proxy: Optional['Proxy'] = None) -> AsyncIterator[Page]:
+        """
+        Выдаёт страницу из пула: async with browser_pool.page("autoru", proxy) as page: ...
+        Для платформы применяется её политика блокировки из settings.BROWSER_BLOCKED_REQUESTS,
+        страница берётся из контекста выхода proxy (из proxy_pool.use).
+        """
+        async with self._semaphore:
+            pooled = await self._acquire(proxy)
+            pooled.policy = RequestPolicy.for_platform(platform)
+            pooled.stats = NavigationStats()
+            healthy = True
+            try:
+                yield pooled.page
+            except Exception:
+                healthy = False
+                raise
+            finally:
+                self._report(platform or "other", pooled.stats)
+                pooled.policy = None
+                await self._release(pooled, healthy)
+
+    def _report(self, platform: str, stats: NavigationStats):
+        totals = self.totals.setdefault(platform, {
+            'navigations': 0, 'blocked': 0, 'bytes_loaded': 0, 'bytes_saved': 0, 'seconds': 0.0
+        })
+        totals['navigations'] += 1
+        totals['blocked'] += stats.blocked_total
+        totals['bytes_loaded'] += stats.bytes_loaded
+        totals['bytes_saved'] += stats.bytes_saved
+        totals['seconds'] += stats.seconds
+        logger.info(
+            f"[{platform}] страница: {stats.seconds:.2f} с, загружено {stats.bytes_loaded // 1024} КБ, "
+            f"отменено запросов {stats.blocked_total} {stats.blocked} (≈{stats.bytes_saved // 1024} КБ сэкономлено)"
+        )
+
+    async def _acquire(self, proxy: Optional['Proxy']) -> _PooledPage:
+        await self.start()
+        exit_name = proxy.name if proxy is not None else None
+        idle = self._idle.get(exit_name, [])
+        while idle:
+            pooled = idle.pop()
+            if not pooled.page.is_closed():
+                return pooled
+            await pooled.close()
+
+        if proxy is not None:
+            context = await self._browser.new_context(proxy=proxy.playwright_proxy(), user_agent=proxy.user_agent)
+        else:
+            context = await self._browser.new_context()
+        page = await context.new_page()
+        pooled = _PooledPage(context, page, exit_name)
+        await pooled.install_routes()
+        return pooled
+
+    async def _release(self, pooled: _PooledPage, healthy: bool):
+        worn_out = pooled.navigations >= self.max_navigations
+        if not healthy or worn_out or pooled.page.is_closed() or not self._browser or not self._browser.is_connected():
+            if worn_out:
+                logger.info(f"Контекст браузера пересоздаётся после {pooled.navigations} переходов")
+            await pooled.close()
+            return
+        self._idle.setdefault(pooled.exit_name, []).append(pooled)
+
+
+browser_pool = BrowserPool()
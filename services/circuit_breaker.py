@@ -0,0 +1,131 @@
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+from config.settings import settings
+from services.errors import PlatformUnavailableError
+
+logger = logging.getLogger(__name__)
+
+# Состояния выключателя
+CLOSED = "closed"        # Запросы идут как обычно
+OPEN = "open"            # Площадка выключена, запросы не отправляются
+HALF_OPEN = "half_open"  # Пропускаем несколько пробных запросов
+
+
+class CircuitBreaker:
+    """Выключатель одной площадки: следит за долей ошибок в последних запросах"""
+
+    def __init__(self, platform: str, window: int, min_calls: int, failure_ratio: float,
+                 open_seconds: float, half_open_probes: int):
+        self.platform = platform
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self.results = deque(maxlen=window)  # True — успех, False — ошибка
+        self.opened_at = 0.0
+        self.probes = 0
+        self.probe_successes = 0
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """Можно ли отправить запрос сейчас"""
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+            self.probes = 0
+            self.probe_successes = 0
+            logger.info(f"[{self.platform}] выключатель: пробные запросы")
+
+        if self.state == HALF_OPEN:
+            if self.probes >= self.half_open_probes:
+                self.rejected += 1
+                return False
+            self.probes += 1
+        return True
+
+    def record(self, success: bool):
+        if self.state == OPEN:
+            # Запрос начался до выключения — на решение он уже не влияет
+            return
+        if self.state == HALF_OPEN:
+            if not success:
+                self._open()
+                return
+            self.probe_successes += 1
+            if self.probe_successes >= self.half_open_probes:
+                self._close()
+            return
+
+        self.results.append(success)
+        failures = self.results.count(False)
+        if len(self.results) >= self.min_calls and failures / len(self.results) >= self.failure_ratio:
+            self._open()
+
+    def cancel(self):
+        """Пробный запрос отменён — освобождаем его место"""
+        if self.state == HALF_OPEN and self.probes > self.probe_successes:
+            self.probes -= 1
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        self.results.clear()
+        logger.warning(f"[{self.platform}] выключатель: площадка выключена на {self.open_seconds} с")
+
+    def _close(self):
+        self.state = CLOSED
+        self.results.clear()
+        logger.info(f"[{self.platform}] выключатель: площадка снова включена")
+
+    def seconds_until_probe(self) -> float:
+        return max(0.0, self.open_seconds - (time.monotonic() - self.opened_at)) if self.state == OPEN else 0.0
+
+
+class CircuitBreakers:
+    """Выключатели всех площадок с общими настройками"""
+
+    def __init__(self, config: Optional[dict] = None):
+        self.config = config or settings.CIRCUIT_BREAKER
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def __getitem__(self, platform: str) -> CircuitBreaker:
+        breaker = self._breakers.get(platform)
+        if breaker is None:
+            breaker = CircuitBreaker(platform, **self.config)
+            self._breakers[platform] = breaker
+        return breaker
+
+    @asynccontextmanager
+    async def guard(self, platform: str) -> AsyncIterator[None]:
+        """
+        async with circuit_breakers.guard("avito"): ...
+        Если площадка выключена — сразу PlatformUnavailableError; исключение внутри считается ошибкой площадки.
+        """
+        breaker = self[platform]
+        if not breaker.allow():
+            raise PlatformUnavailableError(platform, "выключатель разомкнут")
+        try:
+            yield
+        except Exception:
+            breaker.record(False)
+            raise
+        except BaseException:
+            # Отменённый запрос не считается ни успехом, ни ошибкой
+            breaker.cancel()
+            raise
+        breaker.record(True)
+
+    def states(self) -> Dict[str, CircuitBreaker]:
+        return dict(self._breakers)
+
+
+circuit_breakers = CircuitBreakers()
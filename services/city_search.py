@@ -0,0 +1,100 @@
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from storage.cities import locations_dict
+from storage.drom_geo import get_drom_geo_index, DromCity
+
+# Константы
+MIN_SIMILARITY = 0.3   # Ниже этого порога кандидат не показываем
+MAX_CANDIDATES = 10
+
+
+def trigrams(text: str) -> frozenset:
+    """Триграммы строки с пробелами по краям, чтобы начало и конец слова весили больше"""
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class TrigramIndex:
+    """Нечёткий поиск по набору строк: триграмма -> документы, ранжирование по коэффициенту Жаккара"""
+
+    def __init__(self, documents: List[Tuple[str, object]]):
+        # documents: (строка для поиска, значение, которое вернём)
+        self.values = [value for _, value in documents]
+        self.sizes = []
+        self.postings: Dict[str, List[int]] = {}
+        for doc_id, (text, _) in enumerate(documents):
+            grams = trigrams(text)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(doc_id)
+
+    def search(self, query: str, limit: int = MAX_CANDIDATES, min_similarity: float = MIN_SIMILARITY) -> List[Tuple[object, float]]:
+        """Лучшие значения с их похожестью; одно значение возвращается один раз (с лучшей оценкой)"""
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+
+        hits = Counter()
+        for gram in query_grams:
+            postings = self.postings.get(gram)
+            if postings:
+                hits.update(postings)
+
+        best: Dict[object, float] = {}
+        query_size = len(query_grams)
+        for doc_id, common in hits.items():
+            similarity = common / (query_size + self.sizes[doc_id] - common)
+            if similarity < min_similarity:
+                continue
+            value = self.values[doc_id]
+            if similarity > best.get(value, 0):
+                best[value] = similarity
+
+        return sorted(best.items(), key=lambda item: -item[1])[:limit]
+
+
+class CitySearch:
+    """Поиск городов с опечатками: Avito (транслитерированные пути) и Drom (русские названия)"""
+
+    def __init__(self):
+        # Для Avito индексируем каждый «хвост» пути по словам: так kirovskaya_oblast_kirov находится по «kirov»
+        avito_documents = []
+        for path in locations_dict:
+            parts = path.split('_')
+            for start in range(len(parts)):
+                avito_documents.append((' '.join(parts[start:]), path))
+        self.avito = TrigramIndex(avito_documents)
+
+        drom_documents = []
+        for name, cities in get_drom_geo_index().items():
+            for city in cities:
+                drom_documents.append((name, city))
+        self.drom = TrigramIndex(drom_documents)
+
+    def find_avito(self, normalized_city: str, limit: int = MAX_CANDIDATES) -> List[dict]:
+        """Кандидаты Avito для нормализованного (латиница, через _) названия, лучшие первыми"""
+        query = normalized_city.replace('_', ' ')
+        return [
+            {
+                "id": locations_dict[path],
+                "name": path.replace('_', ' ').title(),
+                "path": path
+            }
+            for path, _ in self.avito.search(query, limit)
+        ]
+
+    def find_drom(self, city_name: str, limit: int = MAX_CANDIDATES) -> List[dict]:
+        """Кандидаты Drom для русского названия, в формате DromParser.find_all_matching_cities"""
+        results: List[Tuple[DromCity, float]] = self.drom.search(city_name.strip().lower(), limit)
+        return [
+            {
+                'region': city.region,
+                'city': city.name,
+                'link': city.link
+            }
+            for city, _ in results
+        ]
+
+
+city_search = CitySearch()
@@ -0,0 +1,57 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Collection, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+def merge_ads(merged: Dict[str, Any], ads: List, key: Callable[[Any], str],
+              known: Collection[str] = ()) -> int:
+    """
+    Добавляет объявления страницы в общий список без повторов по ключу,
+    возвращает сколько среди добавленных новых — не встречавшихся ни в обходе, ни в known
+    """
+    added = 0
+    for ad in ads:
+        ad_key = key(ad)
+        if ad_key and ad_key not in merged:
+            merged[ad_key] = ad
+            if ad_key not in known:
+                added += 1
+    return added
+
+
+async def crawl_pages(
+    fetch_page: Callable[[int], Awaitable[List]],
+    key: Callable[[Any], str],
+    max_pages: int,
+    concurrency: int,
+    known: Collection[str] = ()
+) -> List:
+    """
+    Обходит страницы выдачи 1..max_pages. Первая загружается сама по себе,
+    следующие — пачками по concurrency страниц одновременно.
+    Обход останавливается на странице без новых объявлений: выдача отсортирована по дате,
+    поэтому пустая (после отбора свежих) или уже виденная страница значит, что дальше только старое.
+    known — ключи объявлений, виденных в прошлый раз (фоновая проверка): страница только из них тоже конец.
+    """
+    merged: Dict[str, Any] = {}
+    if not merge_ads(merged, await fetch_page(1), key, known):
+        return list(merged.values())
+
+    page = 2
+    while page <= max_pages:
+        batch = list(range(page, min(page + concurrency, max_pages + 1)))
+        results = await asyncio.gather(*(fetch_page(number) for number in batch), return_exceptions=True)
+
+        # Страницы сливаем по порядку, чтобы остановка учитывала только предыдущие
+        for number, ads in zip(batch, results):
+            if isinstance(ads, Exception):
+                logger.error(f"Ошибка загрузки страницы {number}: {ads}")
+                return list(merged.values())
+            if not merge_ads(merged, ads, key, known):
+                logger.info(f"Страница {number} без новых объявлений, обход остановлен")
+                return list(merged.values())
+        page += concurrency
+
+    return list(merged.values())
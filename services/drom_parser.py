@@ -1,135 +1,138 @@
 import asyncio
 import logging
-import random
-import json
-from typing import List, Dict, Optional
+import re
+from typing import Collection, List, Dict, Optional
 
-from playwright.async_api import async_playwright
 import aiohttp
-from bs4 import BeautifulSoup
 
 from config.settings import settings
 from utils.utils import normalize_city_name
+from models.listing import Listing, parse_engine, parse_int, parse_mileage, parse_year
+from services.http_client import HttpClient, http_client
+from services.browser_pool import BrowserPool, browser_pool
+from services.result_cache import result_cache
+from services.page_fingerprint import page_fingerprints
+from services.html_backend import Only, parse_html
+from services.crawler import crawl_pages
+from services.circuit_breaker import circuit_breakers
+from services.proxy_pool import ProxyPool, proxy_pool
+from services.errors import BlockedError, TransientFetchError
+from storage.drom_geo import find_drom_cities, find_drom_city
 
 logger = logging.getLogger(__name__)
 
-def load_cities_data(file_path: str) -> dict:
-    try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return json.load(file)
-    except Exception as e:
-        logger.error(f"Ошибка загрузки данных из {file_path}: {e}")
-        return {}
+# Какие узлы страницы разбирать (остальное пропускается при построении дерева)
+LISTING_NODES = ("div", {"data-ftid": "bulls-list_bull"})
+BRANDS_NODES = (None, {"data-ftid": "component_cars-list-item_name"})
+
+DROM_CATALOG_URL = "https://www.drom.ru/catalog/"
+DROM_ID_PATTERN = re.compile(r"/(\d+)\.html")  # Ссылка на объявление: .../toyota/camry/45678901.html
 
 class DromParser:
-    def __init__(self, proxy=None, base_url="https://drom.ru"):
+    def __init__(self, proxy: Optional[str] = None, base_url="https://drom.ru", http: Optional[HttpClient] = None,
+                 browser: Optional[BrowserPool] = None, proxies: Optional[ProxyPool] = None):
+        self.http = http or http_client
+        self.browser = browser or browser_pool
         self.headers = {
-            'User-Agent': random.choice(settings.USER_AGENTS),
             'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7'
         }
+        # proxy — закрепить парсер за одним прокси, иначе выход выбирается из общего пула
         self.proxy = proxy
+        self.proxies = proxies or (ProxyPool([proxy], use_direct=False) if proxy else proxy_pool)
         self.base_url = base_url
         self.allowed_time = ['часов', 'часа', 'час', 'минут', 'минуту', 'минуты', 'секунд', 'сегодня']
 
     async def fetch_html(self, url: str) -> str:
-        await asyncio.sleep(5)  # Задержка в 5 секунд
-        async with aiohttp.ClientSession(headers=self.headers) as session:
+        """Загружает страницу Drom; 404 — пустая строка, остальные ошибки — FetchError (их учитывает выключатель)"""
+        async with circuit_breakers.guard("drom"), self.proxies.use("drom", url) as proxy:
             try:
-                async with session.get(url) as response:
+                async with self.http.session_for(proxy).get(
+                    url, headers={**self.headers, 'User-Agent': proxy.user_agent}, proxy=proxy.url
+                ) as response:
+                    if response.status == 404:
+                        logger.warning(f"Страница не найдена: {url}")
+                        return ""
+                    if response.status == 403:
+                        raise BlockedError("drom", f"HTTP 403 для {proxy.name}")
                     if response.status != 200:
                         logger.error(f"Ошибка запроса: {response.status} для {url}")
-                        return ""
+                        raise TransientFetchError("drom", f"HTTP {response.status}")
                     return await response.text()
-            except aiohttp.ClientError as e:
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
                 logger.error(f"Ошибка клиента aiohttp: {e}")
-                return ""
+                raise TransientFetchError("drom", f"ошибка сети: {e}")
 
     async def parse_brands_drom(self, html: Optional[str] = None) -> List[str]:
             """Парсит бренды с Drom: через HTML (если передан) или через Playwright+клик «Показать все»."""
             if html:
                 # Старый режим: парсим готовый HTML
-                soup = BeautifulSoup(html, 'html.parser')
-                elems = soup.select('[data-ftid="component_cars-list-item_name"]')
-                brands = [el.text.strip() for el in elems if el.text.strip()]
+                root = parse_html(html, only=BRANDS_NODES)
+                elems = root.select('[data-ftid="component_cars-list-item_name"]')
+                brands = [el.text().strip() for el in elems if el.text().strip()]
                 logger.info(f"Найденные марки из HTML: {brands}")
                 return sorted(set(brands))
 
             # Новый режим: Playwright + автоклик «Показать все»
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                page = await browser.new_page()
-                await page.goto("https://www.drom.ru/catalog/")
-
-                # Ждём первичные элементы
-                await page.wait_for_selector('[data-ftid="component_cars-list-item_name"]')
-
-                # Если есть кнопка «Показать все» — кликаем
-                show_all = await page.query_selector('[data-ftid="component_cars-list_expand-control"]')
-                if show_all:
-                    await show_all.click()
-                    # Даём JS подгрузить остальные элементы
-                    await page.wait_for_timeout(1000)
-
-                # Снова собираем все элементы
-                elems = await page.query_selector_all('[data-ftid="component_cars-list-item_name"]')
-                brands = []
-                for el in elems:
-                    txt = await el.text_content()
-                    if txt:
-                        brands.append(txt.strip())
-
-                await browser.close()
-                logger.info(f"Найденные марки через Playwright (полный список): {brands}")
-                return sorted(set(brands))
+            async with self.proxies.use("drom", DROM_CATALOG_URL) as proxy:
+                async with self.browser.page("drom", proxy) as page:
+                    await page.goto(DROM_CATALOG_URL)
+
+                    # Ждём первичные элементы
+                    await page.wait_for_selector('[data-ftid="component_cars-list-item_name"]')
+
+                    # Если есть кнопка «Показать все» — кликаем
+                    show_all = await page.query_selector('[data-ftid="component_cars-list_expand-control"]')
+                    if show_all:
+                        await show_all.click()
+                        # Даём JS подгрузить остальные элементы
+                        await page.wait_for_timeout(1000)
+
+                    # Снова собираем все элементы
+                    elems = await page.query_selector_all('[data-ftid="component_cars-list-item_name"]')
+                    brands = []
+                    for el in elems:
+                        txt = await el.text_content()
+                        if txt:
+                            brands.append(txt.strip())
+
+                    logger.info(f"Найденные марки через Playwright (полный список): {brands}")
+                    return sorted(set(brands))
 
 
     async def get_location_id_by_city_name(self, city_name: str) -> Optional[str]:
         """Ищет путь города в базе данных."""
-        cities_data = load_cities_data('storage/regions_and_cities.json')
-        for region in cities_data:
-            for city in region.get('cities', []):
-                if city['name'].lower() == city_name.lower():
-                    link = city['link']
-                    city_path = link.split('https://')[-1].split('/')[0]
-                    return city_path
+        city = find_drom_city(city_name)
+        if city:
+            return city.link.split('https://')[-1].split('/')[0]
         logger.warning(f"Город '{city_name}' не найден в базе данных.")
         return None
 
     async def find_all_matching_cities(self, city_name: str) -> List[Dict[str, str]]:
-        cities_data = load_cities_data('storage/regions_and_cities.json')
-        matches = []
-
-        for region in cities_data:
-            region_name = region.get('name')
-            for city in region.get('cities', []):
-                if city['name'].lower() == city_name.lower():
-                    matches.append({
-                        'region': region_name,
-                        'city': city['name'],
-                        'link': city['link']
-                    })
-
-        return matches
-
-    async def parse_ads(self, brand: str, city: str, distance: int, min_price: int, max_price: int, city_link: Optional[str] = None) -> List[Dict]:
-        logger.info(f"Парсим Drom для: {brand=} {city=} {distance=} {min_price=} {max_price=}")
-
+        return [
+            {
+                'region': city.region,
+                'city': city.name,
+                'link': city.link
+            }
+            for city in find_drom_cities(city_name)
+        ]
+
+    def generate_url(self, brand: str, city: str, distance: int, min_price: int, max_price: int,
+                     city_link: Optional[str] = None, page: int = 1) -> str:
+        """Ссылка на страницу page выдачи Drom, пустая строка — город не найден"""
         if not city_link:
-            cities_data = load_cities_data('storage/regions_and_cities.json')
-            for region in cities_data:
-                for city_data in region.get('cities', []):
-                    if city_data['name'].lower() == city.lower():
-                        city_link = city_data['link']
-                        break
-                if city_link:
-                    break
+            city_data = find_drom_city(city)
+            if city_data:
+                city_link = city_data.link
 
         if not city_link:
             logger.warning(f"Не удалось найти город '{city}' в базе данных.")
-            return []
+            return ""
 
         base_url = city_link.split('go=')[-1].split('%2Fauto%2F')[0]
         full_url = f"{base_url}/{brand.lower()}/used/"
+        if page > 1:
+            full_url += f"page{page}/"
         params = {
             "minprice": min_price,
             "maxprice": max_price,
@@ -137,38 +140,81 @@ class DromParser:
         }
         full_url = f"https://www.drom.ru/my_region/?go={full_url}?{'&'.join(f'{key}={value}' for key, value in params.items() if value)}"
         logger.info(f"Сгенерированная ссылка: {full_url}")
+        return full_url
+
+    async def parse_ads(self, brand: str, city: str, distance: int, min_price: int, max_price: int,
+                        city_link: Optional[str] = None, max_pages: Optional[int] = None,
+                        known: Collection[str] = ()) -> List[Listing]:
+        logger.info(f"Парсим Drom для: {brand=} {city=} {distance=} {min_price=} {max_price=}")
+
+        first_url = self.generate_url(brand, city, distance, min_price, max_price, city_link)
+        if not first_url:
+            return []
 
+        return await crawl_pages(
+            lambda page: self._fetch_page(
+                first_url if page == 1 else
+                self.generate_url(brand, city, distance, min_price, max_price, city_link, page=page)
+            ),
+            key=lambda ad: ad.id,
+            max_pages=max_pages or settings.CRAWL_MAX_PAGES["drom"],
+            concurrency=settings.CRAWL_CONCURRENT_PAGES,
+            known=known
+        )
+
+    async def _fetch_page(self, full_url: str) -> List[Listing]:
+        # Свежая выдача берётся из кэша, одинаковые одновременные запросы выполняются один раз
+        return await result_cache.fetch("drom", full_url, lambda: self._parse_listing(full_url))
+
+    async def _parse_listing(self, full_url: str) -> List[Listing]:
+        """Загружает страницу выдачи и разбирает её, если она изменилась с прошлой загрузки"""
         html = await self.fetch_html(full_url)
         if not html:
             logger.error("Пустой HTML для парсинга")
             return []
 
-        soup = BeautifulSoup(html, 'html.parser')
-        ads = []
+        return page_fingerprints.parse("drom", full_url, html, self._parse_html)
+
+    def _parse_html(self, html: str, backend: Optional[str] = None, only: Only = LISTING_NODES) -> List[Listing]:
+        """Объявления страницы выдачи; backend и only — для замеров (benchmarks/parse_backends.py)"""
+        root = parse_html(html, only=only, backend=backend)
+        ads: List[Listing] = []
 
-        ad_blocks = soup.find_all("div", {"data-ftid": "bulls-list_bull"}, limit=10)
+        ad_blocks = root.select('div[data-ftid="bulls-list_bull"]')
         for ad in ad_blocks:
             try:
-                a_tag = ad.find("a", {"data-ftid": "bull_title"})
-                url = a_tag['href'] if a_tag else None
-                title = a_tag.text.strip() if a_tag else "Без названия"
-
-                price_tag = ad.find("span", {"data-ftid": "bull_price"})
-                price = price_tag.text.strip() if price_tag else "Не указана"
-
-                location_tag = ad.find("span", {"data-ftid": "bull_location"})
-                location = location_tag.text.strip() if location_tag else "Не указан"
-
-                date_div = ad.find("div", {"data-ftid": "bull_date"})
-                date_text = date_div.text.strip().lower() if date_div else ""
-
-                if any(t in date_text for t in self.allowed_time):
-                    ads.append({
-                        "title": title,
-                        "url": url,
-                        "price": price,
-                        "location": location
-                    })
+                a_tag = ad.select_one('a[data-ftid="bull_title"]')
+                url = a_tag.attr('href') if a_tag else None
+                title = a_tag.text().strip() if a_tag else "Без названия"
+
+                price_tag = ad.select_one('span[data-ftid="bull_price"]')
+                price = parse_int(price_tag.text()) if price_tag else None
+
+                # Описание: «2.0 л (150 л.с.), бензин, АКПП, передний, 120 тыс. км»
+                description_tag = ad.select_one('[data-ftid="component_inline-bull-description"]')
+                description = description_tag.text() if description_tag else ""
+
+                location_tag = ad.select_one('span[data-ftid="bull_location"]')
+                location = location_tag.text().strip() if location_tag else "Не указан"
+
+                date_div = ad.select_one('div[data-ftid="bull_date"]')
+                date_text = date_div.text().strip().lower() if date_div else ""
+
+                if url and any(t in date_text for t in self.allowed_time):
+                    ad_id = DROM_ID_PATTERN.search(url)
+                    engine_volume, engine_power = parse_engine(description)
+                    ads.append(Listing(
+                        source="drom",
+                        id=ad_id.group(1) if ad_id else url,
+                        title=title,
+                        url=url,
+                        price=price,
+                        year=parse_year(title),
+                        mileage=parse_mileage(description),
+                        engine_volume=engine_volume,
+                        engine_power=engine_power,
+                        address=location
+                    ))
             except Exception as e:
                 logger.warning(f"Ошибка при парсинге объявления: {e}")
 
@@ -179,6 +225,7 @@ async def main():
     parser = DromParser()
     brands = await parser.parse_brands_drom()
     print(brands)
+    await browser_pool.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
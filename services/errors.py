@@ -0,0 +1,38 @@
+class FetchError(Exception):
+    """Не удалось получить выдачу площадки"""
+
+    # Что показать пользователю
+    user_message = "⚠️ Не удалось загрузить объявления. Попробуйте позже."
+
+    def __init__(self, platform: str, detail: str = ""):
+        self.platform = platform
+        self.detail = detail
+        super().__init__(f"{platform}: {detail}" if detail else platform)
+
+
+class PermanentFetchError(FetchError):
+    """Повтор запроса не поможет: возвращаемся сразу, без ретраев"""
+
+
+class BlockedError(PermanentFetchError):
+    """Площадка заблокировала наш IP"""
+
+    user_message = "⛔ Площадка временно ограничила доступ. Попробуйте позже или выберите другую площадку."
+
+
+class CaptchaError(PermanentFetchError):
+    """Вместо выдачи пришла страница с капчей"""
+
+    user_message = "🤖 Площадка запросила проверку «я не робот». Попробуйте позже или выберите другую площадку."
+
+
+class TransientFetchError(FetchError):
+    """Временная ошибка (таймаут, 5xx, 429): имеет смысл повторить"""
+
+    user_message = "⌛ Площадка сейчас не отвечает. Попробуйте через пару минут."
+
+
+class PlatformUnavailableError(PermanentFetchError):
+    """Площадка выключена автоматическим выключателем после серии ошибок, запрос не отправлялся"""
+
+    user_message = "🔌 Площадка временно недоступна. Попробуйте через пару минут или выберите другую площадку."
@@ -0,0 +1,118 @@
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml  # noqa: F401  (нужен BeautifulSoup как движок "lxml")
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+# Чем заменить недоступный движок: от быстрого к медленному
+FALLBACK_ORDER = ("selectolax", "lxml", "html.parser")
+
+# Какую часть страницы разбирать: (тег, атрибуты) для SoupStrainer; None — всю страницу
+Only = Optional[Tuple[Optional[str], Dict[str, str]]]
+
+
+class SoupNode:
+    """Узел BeautifulSoup с общим для всех движков интерфейсом"""
+
+    __slots__ = ("_node",)
+
+    def __init__(self, node):
+        self._node = node
+
+    def select(self, css: str) -> List["SoupNode"]:
+        return [SoupNode(node) for node in self._node.select(css)]
+
+    def select_one(self, css: str) -> Optional["SoupNode"]:
+        node = self._node.select_one(css)
+        return SoupNode(node) if node is not None else None
+
+    def attr(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        value = self._node.get(name, default)
+        # class и подобные атрибуты BeautifulSoup отдаёт списком
+        return " ".join(value) if isinstance(value, list) else value
+
+    def text(self) -> str:
+        return self._node.get_text()
+
+
+class LexborNode:
+    """Узел selectolax (lexbor) с тем же интерфейсом"""
+
+    __slots__ = ("_node",)
+
+    def __init__(self, node):
+        self._node = node
+
+    def select(self, css: str) -> List["LexborNode"]:
+        return [LexborNode(node) for node in self._node.css(css)]
+
+    def select_one(self, css: str) -> Optional["LexborNode"]:
+        node = self._node.css_first(css)
+        return LexborNode(node) if node is not None else None
+
+    def attr(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        value = self._node.attributes.get(name, default)
+        return default if value is None else value
+
+    def text(self) -> str:
+        return self._node.text()
+
+
+def _soup(features: str) -> Callable[[str, Only], SoupNode]:
+    def parse(html: str, only: Only = None) -> SoupNode:
+        # SoupStrainer: дерево строится только для нужных узлов, остальная страница пропускается
+        strainer = SoupStrainer(only[0], attrs=only[1]) if only else None
+        return SoupNode(BeautifulSoup(html, features, parse_only=strainer))
+    return parse
+
+
+def _lexbor(html: str, only: Only = None) -> LexborNode:
+    # lexbor строит всё дерево быстрее, чем BeautifulSoup — его часть, поэтому only не нужен
+    return LexborNode(LexborHTMLParser(html).root)
+
+
+def available_backends() -> Dict[str, Callable[[str, Only], object]]:
+    """Движки, которые можно использовать в текущем окружении"""
+    backends = {"html.parser": _soup("html.parser")}
+    if LXML_AVAILABLE:
+        backends["lxml"] = _soup("lxml")
+    if LexborHTMLParser is not None:
+        backends["selectolax"] = _lexbor
+    return backends
+
+
+BACKENDS = available_backends()
+_unavailable_reported = set()
+
+
+def get_backend(name: Optional[str] = None) -> Callable[[str, Only], object]:
+    """Функция разбора html(html, only) для движка name (по умолчанию из настроек)"""
+    name = name or settings.HTML_PARSER_BACKEND
+    backend = BACKENDS.get(name)
+    if backend is None:
+        fallback = next(candidate for candidate in FALLBACK_ORDER if candidate in BACKENDS)
+        if name not in _unavailable_reported:
+            logger.warning(f"Движок разбора HTML '{name}' недоступен, используется {fallback}")
+            _unavailable_reported.add(name)
+        backend = BACKENDS[fallback]
+    return backend
+
+
+def parse_html(html: str, only: Only = None, backend: Optional[str] = None):
+    """Разбирает html выбранным движком; only ограничивает разбор нужными узлами"""
+    return get_backend(backend)(html, only)
@@ -0,0 +1,86 @@
+import logging
+from typing import Dict, Optional, TYPE_CHECKING
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+from config.settings import settings
+
+if TYPE_CHECKING:
+    from services.proxy_pool import Proxy
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClient:
+    """
+    Общий для всего бота aiohttp-клиент: один пул соединений с keep-alive и кэшем DNS.
+    Создаётся при старте бота и закрывается при остановке, парсеры получают его через конструктор.
+    """
+
+    def __init__(
+        self,
+        limit: int = settings.HTTP_POOL_LIMIT,
+        limit_per_host: int = settings.HTTP_POOL_LIMIT_PER_HOST,
+        dns_cache_ttl: int = settings.HTTP_DNS_CACHE_TTL,
+        keepalive_timeout: float = settings.HTTP_KEEPALIVE_TIMEOUT,
+        timeout: float = settings.HTTP_TIMEOUT
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self._session: Optional[ClientSession] = None
+        # Сессии выходов через прокси: свои куки, но общий пул соединений с основной сессией
+        self._proxy_sessions: Dict[str, ClientSession] = {}
+
+    async def start(self):
+        """Создаёт сессию (вызывается при старте бота)"""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+            logger.info(f"HTTP-клиент запущен (пул: {self.limit}, на хост: {self.limit_per_host})")
+
+    async def close(self):
+        """Закрывает сессию и все соединения пула (при остановке бота)"""
+        for session in self._proxy_sessions.values():
+            if not session.closed:
+                await session.close()
+        self._proxy_sessions.clear()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info("HTTP-клиент остановлен")
+        self._session = None
+
+    @property
+    def session(self) -> ClientSession:
+        """Текущая сессия; если бот её ещё не создал (например, при запуске парсера отдельно) — создаём"""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return self._session
+
+    def session_for(self, proxy: Optional['Proxy']) -> ClientSession:
+        """Сессия выхода: куки, полученные через прокси, не смешиваются с куками других выходов"""
+        if proxy is None or proxy.url is None:
+            return self.session
+        session = self._proxy_sessions.get(proxy.name)
+        if session is None or session.closed or session.connector is None or session.connector.closed:
+            session = ClientSession(
+                connector=self.session.connector,
+                connector_owner=False,
+                timeout=ClientTimeout(total=self.timeout)
+            )
+            self._proxy_sessions[proxy.name] = session
+        return session
+
+    def _create_session(self) -> ClientSession:
+        connector = TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.dns_cache_ttl,
+            use_dns_cache=True,
+            keepalive_timeout=self.keepalive_timeout
+        )
+        return ClientSession(connector=connector, timeout=ClientTimeout(total=self.timeout))
+
+
+http_client = HttpClient()
@@ -0,0 +1,75 @@
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Константы
+MAX_PAGES = 2000  # Сколько последних страниц помнить
+# Сколько секунд доверять прежнему разбору: даты «5 минут назад» в нём стареют, и без повторного
+# разбора объявление не отсеется фильтром свежести. Не дольше паузы между фоновыми проверками.
+MAX_AGE = 10 * 60
+
+# Что попадает в отпечаток страницы: ID объявлений и цены в выдаче.
+# Поиск регулярным выражением по сырому HTML в разы дешевле полного разбора BeautifulSoup.
+FINGERPRINT_PATTERNS = {
+    "avito": re.compile(r'data-item-id="(\d+)"|itemprop="price"\s+content="(\d+)"'),
+    "drom": re.compile(r'auto\.drom\.ru/[\w/-]+?/(\d+)\.html|data-ftid="bull_price"[^>]*>([^<]*)')
+}
+
+
+def page_fingerprint(platform: str, html: str) -> Optional[str]:
+    """Отпечаток выдачи; None — объявлений на странице не нашлось (такому отпечатку не доверяем)"""
+    pattern = FINGERPRINT_PATTERNS.get(platform)
+    if pattern is None:
+        return None
+    values = ["".join(groups) for groups in pattern.findall(html)]
+    if not values:
+        return None
+    return hashlib.sha1("|".join(values).encode("utf-8")).hexdigest()
+
+
+class PageFingerprints:
+    """
+    Помнит отпечаток и разобранные объявления последней загрузки каждого URL.
+    Если страница не изменилась, повторный разбор пропускается и возвращается прежний результат,
+    но не старше max_age секунд — потом страница разбирается заново.
+    """
+
+    def __init__(self, max_pages: int = MAX_PAGES, max_age: float = MAX_AGE):
+        self.max_pages = max_pages
+        self.max_age = max_age
+        # URL -> (отпечаток, объявления, время разбора)
+        self._pages: "OrderedDict[str, Tuple[str, List, float]]" = OrderedDict()
+        self.parsed: Dict[str, int] = {}
+        self.skipped: Dict[str, int] = {}
+
+    def parse(self, platform: str, url: str, html: str, parse: Callable[[str], List]) -> List:
+        """Разбирает html функцией parse, если страница изменилась с прошлой загрузки этого URL"""
+        fingerprint = page_fingerprint(platform, html)
+        now = time.monotonic()
+        previous = self._pages.get(url)
+        if (fingerprint is not None and previous is not None and previous[0] == fingerprint
+                and now - previous[2] < self.max_age):
+            self._pages.move_to_end(url)
+            self.skipped[platform] = self.skipped.get(platform, 0) + 1
+            logger.info(f"Выдача не изменилась, разбор пропущен: {url}")
+            return previous[1]
+
+        ads = parse(html)
+        self.parsed[platform] = self.parsed.get(platform, 0) + 1
+        if fingerprint is not None:
+            self._pages[url] = (fingerprint, ads, now)
+            self._pages.move_to_end(url)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        return ads
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {'parsed': dict(self.parsed), 'skipped': dict(self.skipped)}
+
+
+page_fingerprints = PageFingerprints()
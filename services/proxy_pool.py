@@ -0,0 +1,190 @@
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from config.settings import settings
+from services.errors import BlockedError, CaptchaError
+from services.rate_limiter import rate_limiter
+
+logger = logging.getLogger(__name__)
+
+DIRECT = "direct"  # Имя выхода без прокси (собственный IP бота)
+
+
+class ProxyHealth:
+    """Здоровье выхода на одной площадке: скользящие средние задержки и доли успехов, баны"""
+
+    def __init__(self, alpha: float, initial_latency: float):
+        self.alpha = alpha
+        self.latency = initial_latency  # Секунд на запрос, экспоненциальное скользящее среднее
+        self.success_rate = 1.0         # Новый выход считаем здоровым, пока он не ошибётся
+        self.successes = 0
+        self.failures = 0
+        self.bans = 0
+        self.ban_streak = 0             # Баны подряд, без успешного запроса между ними: от них растёт срок бана
+        self.banned_until = 0.0
+
+    def record_success(self, latency: float):
+        self.successes += 1
+        self.ban_streak = 0
+        self.latency += self.alpha * (latency - self.latency)
+        self.success_rate += self.alpha * (1.0 - self.success_rate)
+
+    def record_failure(self):
+        self.failures += 1
+        self.success_rate -= self.alpha * self.success_rate
+
+    def banned(self, now: float) -> bool:
+        return now < self.banned_until
+
+
+class Proxy:
+    """
+    Один выход в интернет: прокси или собственный IP (url=None).
+    User-Agent закреплён за выходом, чтобы площадка видела с одного IP один и тот же браузер;
+    куки живут в отдельной сессии (http_client.session_for) или контексте браузера этого выхода.
+    """
+
+    def __init__(self, url: Optional[str], user_agent: str, alpha: float, initial_latency: float):
+        self.url = url
+        self.user_agent = user_agent
+        self.alpha = alpha
+        self.initial_latency = initial_latency
+        self.in_flight = 0
+        self.health: Dict[str, ProxyHealth] = {}
+
+        if url is None:
+            self.name = DIRECT
+        else:
+            # В логи и статистику — без логина и пароля
+            parts = urlsplit(url)
+            self.name = f"{parts.hostname}:{parts.port}" if parts.port else parts.hostname or url
+
+    def health_for(self, platform: str) -> ProxyHealth:
+        health = self.health.get(platform)
+        if health is None:
+            health = ProxyHealth(self.alpha, self.initial_latency)
+            self.health[platform] = health
+        return health
+
+    def score(self, platform: str, now: float) -> Optional[float]:
+        """Чем больше, тем лучше; None — выход забанен на площадке"""
+        health = self.health_for(platform)
+        if health.banned(now):
+            return None
+        # Занятый выход делит пропускную способность между запросами
+        return health.success_rate / (health.latency * (1 + self.in_flight))
+
+    def playwright_proxy(self) -> Optional[dict]:
+        """Настройки прокси для контекста Playwright"""
+        if self.url is None:
+            return None
+        parts = urlsplit(self.url)
+        server = f"{parts.scheme}://{parts.hostname}:{parts.port}" if parts.port else f"{parts.scheme}://{parts.hostname}"
+        config = {"server": server}
+        if parts.username:
+            config["username"] = parts.username
+            config["password"] = parts.password or ""
+        return config
+
+
+class ProxyPool:
+    """
+    Пул выходов с оценкой здоровья по каждой площадке (хосту).
+    Для запроса выбирается выход с лучшим отношением доли успехов к задержке;
+    бан или капча выключают выход на этой площадке, с каждым следующим баном подряд — на вдвое больший срок.
+    Последний незабаненный выход не выключается: когда банят все, площадку закрывает её выключатель
+    (services/circuit_breaker.py) и сам же пробует пробным запросом.
+    """
+
+    def __init__(self, urls: Optional[List[str]] = None, use_direct: Optional[bool] = None,
+                 config: Optional[dict] = None):
+        urls = settings.PROXIES if urls is None else urls
+        use_direct = settings.PROXY_USE_DIRECT if use_direct is None else use_direct
+        self.config = config or settings.PROXY_POOL
+
+        exits: List[Optional[str]] = ([None] if use_direct or not urls else []) + list(urls)
+        self.proxies = [
+            Proxy(url, settings.USER_AGENTS[index % len(settings.USER_AGENTS)],
+                  self.config["ewma_alpha"], self.config["initial_latency"])
+            for index, url in enumerate(exits)
+        ]
+
+    def choose(self, platform: str) -> Optional[Proxy]:
+        """Самый здоровый из незабаненных на площадке выходов"""
+        now = time.monotonic()
+        best, best_score = None, None
+        for proxy in self.proxies:
+            score = proxy.score(platform, now)
+            if score is not None and (best_score is None or score > best_score):
+                best, best_score = proxy, score
+        return best
+
+    def available(self, platform: str, exclude: Optional[Proxy] = None) -> bool:
+        """Есть ли незабаненный на площадке выход, кроме exclude"""
+        now = time.monotonic()
+        return any(proxy is not exclude and proxy.score(platform, now) is not None for proxy in self.proxies)
+
+    @asynccontextmanager
+    async def use(self, platform: str, url: Optional[str] = None) -> AsyncIterator[Proxy]:
+        """
+        async with proxy_pool.use("avito", url) as proxy: ...
+        Если передан url, сначала ждёт очереди к нему через этот выход (rate_limiter).
+        Время запроса без этого ожидания и его исход записываются в здоровье выхода:
+        BlockedError и CaptchaError — бан, остальные исключения — ошибка.
+        Если все выходы забанены — BlockedError без запроса.
+        """
+        proxy = self.choose(platform)
+        if proxy is None:
+            raise BlockedError(platform, "все прокси заблокированы площадкой")
+
+        health = proxy.health_for(platform)
+        proxy.in_flight += 1
+        try:
+            if url is not None:
+                await rate_limiter.wait(url, proxy.name)
+            started = time.monotonic()
+            yield proxy
+        except (BlockedError, CaptchaError):
+            health.record_failure()
+            self._ban(proxy, platform, health)
+            raise
+        except Exception:
+            health.record_failure()
+            raise
+        else:
+            health.record_success(time.monotonic() - started)
+        finally:
+            proxy.in_flight -= 1
+
+    def _ban(self, proxy: Proxy, platform: str, health: ProxyHealth):
+        if not self.available(platform, exclude=proxy):
+            logger.warning(f"[{platform}] выход {proxy.name} заблокирован, но он последний — не выключаем")
+            return
+        seconds = min(self.config["ban_seconds"] * 2 ** health.ban_streak, self.config["ban_seconds_max"])
+        health.bans += 1
+        health.ban_streak += 1
+        health.banned_until = time.monotonic() + seconds
+        logger.warning(f"[{platform}] выход {proxy.name} забанен, не используется {seconds:.0f} с")
+
+    def stats(self) -> Dict[str, Dict[str, dict]]:
+        now = time.monotonic()
+        return {
+            proxy.name: {
+                platform: {
+                    'latency': round(health.latency, 2),
+                    'success_rate': round(health.success_rate, 2),
+                    'successes': health.successes,
+                    'failures': health.failures,
+                    'bans': health.bans,
+                    'banned_for': max(0, round(health.banned_until - now))
+                }
+                for platform, health in proxy.health.items()
+            }
+            for proxy in self.proxies
+        }
+
+
+proxy_pool = ProxyPool()
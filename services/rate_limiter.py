@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_delay(attempt: int, base: float = settings.FETCH_BACKOFF_BASE, cap: float = settings.FETCH_BACKOFF_CAP) -> float:
+    """Задержка перед повтором: экспоненциальная с потолком и случайной добавкой, чтобы повторы не шли залпом"""
+    return min(cap, base * 2 ** attempt) + random.uniform(0, base)
+
+
+class TokenBucket:
+    """
+    Маркерная корзина: rate запросов в секунду в среднем и до burst запросов подряд.
+    Пока маркеры есть, запрос проходит без задержки; иначе ждёт ровно столько, сколько нужно.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.waits = 0
+        self.waited_seconds = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        # Маркер резервируется сразу (баланс может уйти в минус), поэтому ждущие не обгоняют друг друга
+        self._refill()
+        self.tokens -= 1
+        if self.tokens < 0:
+            delay = -self.tokens / self.rate
+            self.waits += 1
+            self.waited_seconds += delay
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds: float):
+        """Сайт попросил подождать (429): следующие запросы к хосту начнутся не раньше чем через seconds"""
+        self._refill()
+        # Один маркер оставляем следующему запросу: он и дождётся окончания паузы
+        self.tokens = min(self.tokens, 1) - seconds * self.rate
+
+
+class RateLimiter:
+    """
+    Общие для всего бота ограничители запросов по хостам (поддомены делят корзину домена).
+    Лимит считается отдельно для каждого выхода (via — имя прокси из proxy_pool): площадка ограничивает IP, а не бота.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, dict]] = None, default: Optional[dict] = None):
+        self.limits = limits or settings.RATE_LIMITS
+        self.default = default or settings.RATE_LIMIT_DEFAULT
+        self._buckets: Dict[Tuple[str, Optional[str]], TokenBucket] = {}
+
+    def _domain(self, url: str) -> str:
+        host = urlsplit(url).hostname or ""
+        for domain in self.limits:
+            if host == domain or host.endswith("." + domain):
+                return domain
+        return host
+
+    def bucket(self, url: str, via: Optional[str] = None) -> TokenBucket:
+        domain = self._domain(url)
+        bucket = self._buckets.get((domain, via))
+        if bucket is None:
+            limit = self.limits.get(domain, self.default)
+            bucket = TokenBucket(limit["rate"], limit["burst"])
+            self._buckets[(domain, via)] = bucket
+        return bucket
+
+    async def wait(self, url: str, via: Optional[str] = None):
+        """Вызывается перед каждым запросом или переходом браузера на url"""
+        await self.bucket(url, via).acquire()
+
+    def pause(self, url: str, seconds: float, via: Optional[str] = None):
+        logger.warning(f"Запросы к {self._domain(url)}{f' через {via}' if via else ''} приостановлены на {seconds} с")
+        self.bucket(url, via).pause(seconds)
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            f"{domain} через {via}" if via else domain: {
+                'waits': bucket.waits, 'waited_seconds': round(bucket.waited_seconds, 1)
+            }
+            for (domain, via), bucket in self._buckets.items()
+        }
+
+
+rate_limiter = RateLimiter()
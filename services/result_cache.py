@@ -0,0 +1,90 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config.settings import settings
+from services.single_flight import single_flight, canonical_url
+from services.errors import PlatformUnavailableError
+
+logger = logging.getLogger(__name__)
+
+# Константы
+DEFAULT_TTL = 120  # Для платформ, которых нет в settings.RESULT_CACHE_TTL
+
+
+class ResultCache:
+    """
+    Кэш разобранной выдачи: ключ — канонический URL, у каждой платформы свой TTL,
+    при переполнении вытесняется давно не использованная запись (LRU).
+    Общий для хендлеров и фоновой проверки.
+    """
+
+    def __init__(self, max_entries: int = settings.RESULT_CACHE_MAX_ENTRIES,
+                 ttl: Optional[Dict[str, int]] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl or settings.RESULT_CACHE_TTL
+        # key -> (platform, время истечения, объявления)
+        self._entries: "OrderedDict[str, Tuple[str, float, List]]" = OrderedDict()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.evictions = 0
+        self.expired = 0
+        self.stale_served = 0
+
+    def get(self, platform: str, key: str) -> Optional[List]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits[platform] = self.hits.get(platform, 0) + 1
+                return entry[2]
+            # Устаревшую запись не удаляем: она пригодится, если площадка станет недоступна
+            self.expired += 1
+        self.misses[platform] = self.misses.get(platform, 0) + 1
+        return None
+
+    def put(self, platform: str, key: str, ads: List):
+        expires = time.monotonic() + self.ttl.get(platform, DEFAULT_TTL)
+        self._entries[key] = (platform, expires, ads)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def fetch(self, platform: str, url: str, load: Callable[[], Awaitable[List]]) -> List:
+        """
+        Выдача по URL из кэша, а при промахе — загрузка через single_flight.
+        Возвращается копия списка: вызывающий может её менять.
+        """
+        key = canonical_url(url)
+        ads = self.get(platform, key)
+        if ads is None:
+            try:
+                ads = await single_flight.run(key, load)
+            except PlatformUnavailableError:
+                # Площадка выключена — отдаём последнюю известную выдачу, если она есть
+                entry = self._entries.get(key)
+                if entry is None:
+                    raise
+                self.stale_served += 1
+                logger.info(f"Площадка {platform} недоступна, отдаю устаревшую выдачу: {url}")
+                return list(entry[2])
+            # Пустую выдачу не кэшируем: обычно это ошибка загрузки, а не отсутствие объявлений
+            if ads:
+                self.put(platform, key, ads)
+        return list(ads)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': dict(self.hits),
+            'misses': dict(self.misses),
+            'evictions': self.evictions,
+            'expired': self.expired,
+            'stale_served': self.stale_served
+        }
+
+
+result_cache = ResultCache()
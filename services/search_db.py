@@ -0,0 +1,255 @@
+import json
+import sqlite3
+import logging
+from pathlib import Path
+from threading import RLock
+from typing import Dict, List, Optional
+
+from models.listing import normalize_record
+
+logger = logging.getLogger(__name__)
+
+# Константы
+DB_PATH = Path("storage/searches.db")
+LEGACY_JSON_PATH = Path("storage/searches.json")
+# Сколько ID подставлять в один запрос IN (...): SQLite до 3.32 принимает не больше 999 параметров
+QUERY_CHUNK_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS searches (
+    id              TEXT PRIMARY KEY,
+    user_id         TEXT NOT NULL,
+    platform        TEXT NOT NULL,
+    params          TEXT NOT NULL,
+    last_result_ids TEXT NOT NULL DEFAULT '[]',
+    notifications   INTEGER NOT NULL DEFAULT 1,
+    created_at      TEXT,
+    updated_at      TEXT,
+    last_check      TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_searches_user ON searches(user_id, platform);
+CREATE INDEX IF NOT EXISTS idx_searches_updated ON searches(updated_at);
+
+CREATE TABLE IF NOT EXISTS search_results (
+    search_id TEXT NOT NULL REFERENCES searches(id) ON DELETE CASCADE,
+    ad_id     TEXT NOT NULL,
+    position  INTEGER NOT NULL,
+    data      TEXT NOT NULL,
+    PRIMARY KEY (search_id, ad_id)
+);
+CREATE INDEX IF NOT EXISTS idx_results_search ON search_results(search_id, position);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+SEARCH_COLUMNS = (
+    "id, user_id, platform, params, last_result_ids, notifications, "
+    "created_at, updated_at, last_check"
+)
+
+db_lock = RLock()  # Одно соединение на процесс, доступ к нему сериализуем
+_connection: Optional[sqlite3.Connection] = None
+
+
+def get_connection() -> sqlite3.Connection:
+    """Возвращает общее соединение с БД, при первом вызове создаёт схему и переносит JSON"""
+    global _connection
+    with db_lock:
+        if _connection is None:
+            DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.executescript(SCHEMA)
+            _connection = conn
+            migrate_from_json(conn)
+        return _connection
+
+
+def close_connection():
+    """Закрывает соединение (при остановке бота)"""
+    global _connection
+    with db_lock:
+        if _connection is not None:
+            _connection.close()
+            _connection = None
+
+
+class transaction:
+    """Контекстный менеджер: BEGIN IMMEDIATE ... COMMIT/ROLLBACK под общей блокировкой"""
+
+    def __enter__(self) -> sqlite3.Connection:
+        db_lock.acquire()
+        self.conn = get_connection()
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.conn.execute("COMMIT")
+            else:
+                self.conn.execute("ROLLBACK")
+        finally:
+            db_lock.release()
+        return False
+
+
+def dump_params(params: dict) -> str:
+    """Каноничное представление параметров, чтобы сравнивать поиски прямо в SQL"""
+    return json.dumps(params, sort_keys=True, ensure_ascii=False)
+
+
+def row_to_search(row: sqlite3.Row, results: Optional[Dict[str, dict]] = None) -> dict:
+    """Собирает словарь поиска в прежнем (JSON) формате"""
+    return {
+        'id': row['id'],
+        'params': json.loads(row['params']),
+        'last_result_ids': json.loads(row['last_result_ids']),
+        'last_results': results if results is not None else {},
+        'notifications': bool(row['notifications']),
+        'created_at': row['created_at'],
+        'updated_at': row['updated_at'],
+        'last_check': row['last_check']
+    }
+
+
+def fetch_results(conn: sqlite3.Connection, search_ids: List[str]) -> Dict[str, Dict[str, dict]]:
+    """Загружает результаты сразу для нескольких поисков: {search_id: {ad_id: ad}}"""
+    results: Dict[str, Dict[str, dict]] = {search_id: {} for search_id in search_ids}
+    if not search_ids:
+        return results
+
+    for start in range(0, len(search_ids), QUERY_CHUNK_SIZE):
+        chunk = search_ids[start:start + QUERY_CHUNK_SIZE]
+        placeholders = ",".join("?" * len(chunk))
+        rows = conn.execute(
+            f"SELECT search_id, ad_id, data FROM search_results "
+            f"WHERE search_id IN ({placeholders}) ORDER BY search_id, position",
+            chunk
+        )
+        for row in rows:
+            # Старые записи получают числовые поля здесь, один раз на загрузку
+            results[row['search_id']][row['ad_id']] = normalize_record(json.loads(row['data']))
+    return results
+
+
+def insert_search(conn: sqlite3.Connection, user_id: str, platform: str, search: dict):
+    """Вставляет поиск вместе с результатами"""
+    conn.execute(
+        f"INSERT INTO searches ({SEARCH_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            search['id'],
+            user_id,
+            platform,
+            dump_params(search.get('params', {})),
+            json.dumps(search.get('last_result_ids', []), ensure_ascii=False),
+            int(search.get('notifications', True)),
+            search.get('created_at'),
+            search.get('updated_at', search.get('created_at')),
+            search.get('last_check')
+        )
+    )
+    replace_results(conn, search['id'], search.get('last_results', {}))
+
+
+def upsert_search(conn: sqlite3.Connection, user_id: str, platform: str, search: dict, with_results: bool = True):
+    """Обновляет строку поиска (или вставляет новую), результаты переписывает только при необходимости"""
+    conn.execute(
+        f"INSERT INTO searches ({SEARCH_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT(id) DO UPDATE SET user_id = excluded.user_id, platform = excluded.platform, "
+        "params = excluded.params, last_result_ids = excluded.last_result_ids, "
+        "notifications = excluded.notifications, created_at = excluded.created_at, "
+        "updated_at = excluded.updated_at, last_check = excluded.last_check",
+        (
+            search['id'],
+            user_id,
+            platform,
+            dump_params(search.get('params', {})),
+            json.dumps(search.get('last_result_ids', []), ensure_ascii=False),
+            int(search.get('notifications', True)),
+            search.get('created_at'),
+            search.get('updated_at', search.get('created_at')),
+            search.get('last_check')
+        )
+    )
+    if with_results:
+        replace_results(conn, search['id'], search.get('last_results', {}))
+
+
+def search_owner(conn: sqlite3.Connection, search_id: str) -> Optional[str]:
+    """Владелец поиска с таким ID среди всех пользователей, None — ID свободен"""
+    row = conn.execute("SELECT user_id FROM searches WHERE id = ?", (search_id,)).fetchone()
+    return row['user_id'] if row else None
+
+
+def load_user(conn: sqlite3.Connection, user_id: str) -> Dict[str, List[dict]]:
+    """Загружает все поиски одного пользователя в прежнем формате {platform: [search]}"""
+    rows = conn.execute(
+        f"SELECT {SEARCH_COLUMNS} FROM searches WHERE user_id = ? ORDER BY rowid",
+        (user_id,)
+    ).fetchall()
+    results = fetch_results(conn, [row['id'] for row in rows])
+
+    user_searches: Dict[str, List[dict]] = {}
+    for row in rows:
+        user_searches.setdefault(row['platform'], []).append(row_to_search(row, results[row['id']]))
+    return user_searches
+
+
+def replace_results(conn: sqlite3.Connection, search_id: str, results: Dict[str, dict]):
+    """Полностью заменяет результаты одного поиска"""
+    conn.execute("DELETE FROM search_results WHERE search_id = ?", (search_id,))
+    if isinstance(results, list):
+        # Старый формат: список объявлений вместо словаря
+        results = {str(ad.get('id', i)): ad for i, ad in enumerate(results)}
+    conn.executemany(
+        "INSERT OR REPLACE INTO search_results (search_id, ad_id, position, data) VALUES (?, ?, ?, ?)",
+        (
+            (search_id, ad_id, position, json.dumps(ad, ensure_ascii=False))
+            for position, (ad_id, ad) in enumerate(results.items())
+        )
+    )
+
+
+def migrate_from_json(conn: sqlite3.Connection, json_path: Path = LEGACY_JSON_PATH) -> int:
+    """Однократно переносит поиски из старого searches.json в БД"""
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+        return 0
+
+    migrated = 0
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if json_path.exists():
+            with open(json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            for user_id, user_searches in data.items():
+                for platform, platform_searches in user_searches.items():
+                    for search in platform_searches:
+                        if conn.execute("SELECT 1 FROM searches WHERE id = ?", (search['id'],)).fetchone():
+                            continue
+                        insert_search(conn, str(user_id), platform, search)
+                        migrated += 1
+
+        conn.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', ?)", (str(json_path),))
+        conn.execute("COMMIT")
+    except Exception as e:
+        conn.execute("ROLLBACK")
+        logger.error(f"Ошибка миграции {json_path} в SQLite: {e}", exc_info=True)
+        return 0
+
+    if migrated:
+        logger.info(f"Перенесено {migrated} поисков из {json_path} в {DB_PATH}")
+    return migrated
+
+
+if __name__ == '__main__':
+    # Ручной запуск миграции: python -m services.search_db
+    logging.basicConfig(level=logging.INFO)
+    get_connection()
@@ -0,0 +1,185 @@
+import atexit
+import json
+import logging
+from threading import RLock, Timer, Lock
+from typing import Dict, List, Optional, Set, Tuple
+
+from services.search_db import db_lock, transaction, get_connection, load_user, upsert_search, search_owner
+
+logger = logging.getLogger(__name__)
+
+# Константы
+FLUSH_DELAY_SECONDS = 5.0  # Через сколько секунд после первого изменения данные уходят в БД
+
+
+class SearchRepository:
+    """
+    Кэш поисков в памяти поверх SQLite.
+    Пользователь загружается из БД при первом обращении, дальше чтения идут из памяти.
+    Изменения помечаются как «грязные» и пачкой сбрасываются в БД по таймеру или при остановке.
+    """
+
+    def __init__(self, flush_delay: float = FLUSH_DELAY_SECONDS):
+        self.flush_delay = flush_delay
+        self._users: Dict[str, Dict[str, List[dict]]] = {}
+        # search_id -> (user_id, platform, позиция в списке платформы)
+        self._index: Dict[str, Tuple[str, str, int]] = {}
+        # user_id -> {search_id: нужно ли переписать результаты}
+        self._dirty: Dict[str, Dict[str, bool]] = {}
+        self._deleted: Set[str] = set()
+        self.lock = RLock()
+        self._flush_lock = Lock()
+        self._timer: Optional[Timer] = None
+
+    def user(self, user_id) -> Dict[str, List[dict]]:
+        """Возвращает поиски пользователя {platform: [search]} (загружает из БД при промахе)"""
+        user_id = str(user_id)
+        with self.lock:
+            user_searches = self._users.get(user_id)
+            if user_searches is None:
+                with db_lock:
+                    user_searches = load_user(get_connection(), user_id)
+                self._users[user_id] = user_searches
+                for platform, platform_searches in user_searches.items():
+                    self._reindex(user_id, platform, platform_searches)
+            return user_searches
+
+    def _reindex(self, user_id: str, platform: str, platform_searches: List[dict], start: int = 0):
+        """Обновляет позиции в индексе для хвоста списка платформы, начиная со start"""
+        for position in range(start, len(platform_searches)):
+            self._index[platform_searches[position]['id']] = (user_id, platform, position)
+
+    def find(self, user_id, search_id: str) -> Optional[Tuple[str, dict]]:
+        """Ищет поиск пользователя по ID за O(1), возвращает (platform, search)"""
+        user_id = str(user_id)
+        with self.lock:
+            if user_id not in self._users:
+                self.user(user_id)
+            entry = self._index.get(search_id)
+            if entry is None or entry[0] != user_id:
+                return None
+            _, platform, position = entry
+            return platform, self._users[user_id][platform][position]
+
+    def owner(self, search_id: str) -> Optional[str]:
+        """Чей поиск с таким ID: из кэша, а для незагруженных пользователей — из БД. None — ID свободен"""
+        with self.lock:
+            entry = self._index.get(search_id)
+            if entry is not None:
+                return entry[0]
+            if search_id in self._deleted:
+                return None
+            with db_lock:
+                return search_owner(get_connection(), search_id)
+
+    def add(self, user_id, platform: str, search: dict):
+        """Добавляет новый поиск; ID, уже занятый любым поиском, — ValueError (иначе индекс указал бы на чужой)"""
+        user_id = str(user_id)
+        with self.lock:
+            owner = self.owner(search['id'])
+            if owner is not None:
+                raise ValueError(f"Поиск {search['id']} уже существует (пользователь {owner})")
+            platform_searches = self.user(user_id).setdefault(platform, [])
+            platform_searches.append(search)
+            self._index[search['id']] = (user_id, platform, len(platform_searches) - 1)
+            self._deleted.discard(search['id'])
+            self.mark_dirty(user_id, search['id'], results=True)
+
+    def remove(self, user_id, search_id: str) -> bool:
+        """Удаляет поиск, пустые платформы убираются из словаря пользователя"""
+        user_id = str(user_id)
+        with self.lock:
+            if self.find(user_id, search_id) is None:
+                return False
+
+            _, platform, position = self._index.pop(search_id)
+            user_searches = self._users[user_id]
+            platform_searches = user_searches[platform]
+            platform_searches.pop(position)
+            if platform_searches:
+                self._reindex(user_id, platform, platform_searches, start=position)
+            else:
+                user_searches.pop(platform)
+
+            self._dirty.get(user_id, {}).pop(search_id, None)
+            self._deleted.add(search_id)
+            self._schedule_flush()
+            return True
+
+    def forget(self, search_ids: List[str]):
+        """Убирает из кэша поиски, удалённые напрямую в БД"""
+        ids = set(search_ids)
+        with self.lock:
+            touched = {self._index.pop(search_id)[:2] for search_id in ids if search_id in self._index}
+            for user_id, platform in touched:
+                user_searches = self._users[user_id]
+                platform_searches = [s for s in user_searches[platform] if s['id'] not in ids]
+                if platform_searches:
+                    user_searches[platform] = platform_searches
+                    self._reindex(user_id, platform, platform_searches)
+                else:
+                    user_searches.pop(platform)
+
+    def mark_dirty(self, user_id, search_id: str, results: bool = False):
+        """Помечает поиск изменённым; results=True — переписать и его результаты"""
+        with self.lock:
+            user_dirty = self._dirty.setdefault(str(user_id), {})
+            user_dirty[search_id] = user_dirty.get(search_id, False) or results
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._timer is None and self.flush_delay > 0:
+            self._timer = Timer(self.flush_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> int:
+        """Сбрасывает накопленные изменения в БД одной транзакцией, возвращает число записанных поисков"""
+        with self._flush_lock:
+            with self.lock:
+                self._timer = None
+                dirty, self._dirty = self._dirty, {}
+                deleted, self._deleted = self._deleted, set()
+
+                # Снимок делаем под блокировкой, в БД пишем уже без неё
+                snapshot = []
+                for user_id, searches in dirty.items():
+                    for search_id, with_results in searches.items():
+                        found = self.find(user_id, search_id)
+                        if found is not None:
+                            platform, search = found
+                            snapshot.append((user_id, platform, json.loads(json.dumps(search)), with_results))
+
+            if not snapshot and not deleted:
+                return 0
+
+            try:
+                with transaction() as conn:
+                    conn.executemany("DELETE FROM searches WHERE id = ?", ((i,) for i in deleted))
+                    for user_id, platform, search, with_results in snapshot:
+                        upsert_search(conn, user_id, platform, search, with_results)
+            except Exception as e:
+                logger.error(f"Ошибка сохранения поисков в БД: {e}", exc_info=True)
+                # Возвращаем изменения обратно, чтобы не потерять их при следующем сбросе
+                with self.lock:
+                    for user_id, searches in dirty.items():
+                        for search_id, with_results in searches.items():
+                            self.mark_dirty(user_id, search_id, with_results)
+                    self._deleted |= deleted - {sid for u in self._dirty.values() for sid in u}
+                    self._schedule_flush()
+                return 0
+
+            logger.info(f"Сохранено поисков: {len(snapshot)}, удалено: {len(deleted)}")
+            return len(snapshot)
+
+    def close(self):
+        """Останавливает таймер и сбрасывает всё несохранённое (при остановке бота)"""
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self.flush()
+
+
+search_repository = SearchRepository()
+atexit.register(search_repository.close)
@@ -1,5 +1,4 @@
 import json
-from pathlib import Path
 from datetime import datetime, timedelta
 import uuid
 from typing import Dict, List, Optional, Tuple
@@ -11,56 +10,97 @@ from collections import defaultdict
 from typing import Dict, Any
 from collections import defaultdict
 import csv
-from pathlib import Path
 from openpyxl import Workbook
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from threading import Lock
+from services.search_db import db_lock, transaction, get_connection, fetch_results, row_to_search, SEARCH_COLUMNS
+from services.search_repository import search_repository
+from models.listing import normalize_record
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Константы
-STORAGE_PATH = Path("storage/searches.json")
 MAX_RESULTS_PER_SEARCH = 200  # Максимальное количество сохраняемых результатов
 MAX_SEARCH_AGE_DAYS = 30      # Максимальный возраст поиска в днях
 MAX_SEARCHES_PER_USER = 20    # Максимальное количество поисков на пользователя
 
-lock = Lock()  # Для потокобезопасности при записи
-
 def load_searches() -> Dict[str, Dict[str, List[dict]]]:
-    """Загружает все поиски пользователей с обработкой ошибок"""
+    """Загружает все поиски всех пользователей (тяжёлая операция, только для админки)"""
+    search_repository.flush()
     try:
-        if not STORAGE_PATH.exists():
-            return {}
-
-        with open(STORAGE_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data
+        with db_lock:
+            conn = get_connection()
+            rows = conn.execute(f"SELECT {SEARCH_COLUMNS} FROM searches ORDER BY rowid").fetchall()
+            results = fetch_results(conn, [row['id'] for row in rows])
     except Exception as e:
         logger.error(f"Error loading searches: {e}")
         return {}
 
-def save_searches(searches: Dict[str, Dict[str, List[dict]]]):
-    """Сохраняет поисковые данные с обработкой ошибок"""
-    try:
-        STORAGE_PATH.parent.mkdir(parents=True, exist_ok=True)
-        logger.info(f"Пытаюсь сохранить в {STORAGE_PATH.absolute()}")
-        with open(STORAGE_PATH, 'w', encoding='utf-8') as f:
-            json.dump(searches, f, indent=4, ensure_ascii=False)
-        logger.info("Данные успешно сохранены")
-    except Exception as e:
-        logger.error(f"Ошибка сохранения: {e}", exc_info=True)
-        raise  # Добавьте это для отладки
-    print("Перед сохранением:", json.dumps(searches, indent=2, ensure_ascii=False))
-    print("Сохраняется в файл:", STORAGE_PATH.resolve())
-
-
+    searches: Dict[str, Dict[str, List[dict]]] = {}
+    for row in rows:
+        user_searches = searches.setdefault(row['user_id'], {})
+        user_searches.setdefault(row['platform'], []).append(row_to_search(row, results[row['id']]))
+    return searches
+
+def get_storage_stats() -> Tuple[int, int]:
+    """Возвращает (количество пользователей, количество поисков)"""
+    search_repository.flush()
+    with db_lock:
+        row = get_connection().execute(
+            "SELECT COUNT(DISTINCT user_id), COUNT(*) FROM searches"
+        ).fetchone()
+    return row[0], row[1]
+
+def get_all_user_ids() -> List[str]:
+    """Возвращает ID всех пользователей, у которых есть сохранённые поиски"""
+    search_repository.flush()
+    with db_lock:
+        rows = get_connection().execute("SELECT DISTINCT user_id FROM searches").fetchall()
+    return [row['user_id'] for row in rows]
+
+
+def search_snapshot(search: dict) -> dict:
+    """
+    Копия поиска для чтения без блокировки. Под блокировкой поля поиска только заменяются целиком
+    (save_search, update_search_results, toggle_notifications), а вложенные словари и списки
+    на месте не меняются — поэтому достаточно скопировать верхний уровень, без объявлений.
+    """
+    return dict(search)
 
 def get_user_searches(user_id: int) -> Dict[str, List[dict]]:
-    """Получает все поиски пользователя"""
-    searches = load_searches()
-    return searches.get(str(user_id), {})
+    """
+    Получает все поиски пользователя: снимки, снятые под блокировкой репозитория.
+    Кэш тем временем меняют другие потоки, поэтому живые словари наружу не отдаются.
+    """
+    with search_repository.lock:
+        return {
+            platform: [search_snapshot(search) for search in searches]
+            for platform, searches in search_repository.user(user_id).items()
+        }
+
+def ad_key(ad: dict) -> Optional[str]:
+    """Стабильный ключ объявления: ID площадки, а если его нет — ссылка"""
+    return ad.get('id') or ad.get('url')
+
+def build_results_dict(ads: List[dict]) -> Dict[str, dict]:
+    """Преобразует список объявлений в формат хранения (словарь с ID в качестве ключей)"""
+    results_dict = {}
+    for ad in ads:
+        ad_id = ad_key(ad) or str(uuid.uuid4())
+        brand = ad.get('brand')
+        model = ad.get('model')
+        if not brand or brand == "Не указана" or not model or model == "Не указана":
+            # Попробовать извлечь из title
+            brand_from_title, model_from_title = extract_brand_model(ad.get('title', ''))
+            if not brand or brand == "Не указана":
+                brand = brand_from_title
+            if not model or model == "Не указана":
+                model = model_from_title
+        # Объявление уже в формате Listing.to_dict() (импорт может принести старый — дописываем числа),
+        # добавляем только марку и модель
+        results_dict[ad_id] = normalize_record({**ad, 'brand': brand, 'model': model})
+    return results_dict
 
 def save_search(
     user_id: int,
@@ -74,42 +114,17 @@ def save_search(
     Сохраняет новый поиск с результатами
     Возвращает (search_id, is_new_search)
     """
-    with lock:
-        searches = load_searches()
-        user_id_str = str(user_id)
-        user_searches = searches.setdefault(user_id_str, {})
-        platform_searches = user_searches.setdefault(platform, [])
-        
+    now_iso = datetime.utcnow().isoformat()
+    results_dict = build_results_dict(last_results)
+    with search_repository.lock:
+        user_searches = search_repository.user(user_id)
+        platform_searches = user_searches.get(platform, [])
+
         # Проверяем, не превышен ли лимит поисков
         total_searches = sum(len(s) for s in user_searches.values())
         if total_searches >= MAX_SEARCHES_PER_USER:
             return "", False
-        
-        now_iso = datetime.utcnow().isoformat()
-        
-        # Преобразуем результаты в новый формат (словарь с ID в качестве ключей)
-        results_dict = {}
-        for ad in last_results:
-            ad_id = ad.get('id') or str(uuid.uuid4())
-            brand = ad.get('brand')
-            model = ad.get('model')
-            if not brand or brand == "Не указана" or not model or model == "Не указана":
-                # Попробовать извлечь из title
-                brand_from_title, model_from_title = extract_brand_model(ad.get('title', ''))
-                if not brand or brand == "Не указана":
-                    brand = brand_from_title
-                if not model or model == "Не указана":
-                    model = model_from_title
-            results_dict[ad_id] = {
-                'title': ad.get('title', 'Без названия'),
-                'price': ad.get('price', 'Не указана'),
-                'brand': brand,
-                'model': model,
-                'address': ad.get('address', 'Не указано'),
-                'url': ad.get('url', '#'),
-                'date': ad.get('date', 'Не указана')
-            }
-        
+
         # Ищем существующий поиск с такими же параметрами
         for search in platform_searches:
             if search['params'] == params:
@@ -118,10 +133,10 @@ def save_search(
                 search['last_results'] = results_dict
                 search['last_check'] = now_iso
                 search['updated_at'] = now_iso
-                save_searches(searches)
+                search_repository.mark_dirty(user_id, search['id'], results=True)
                 logger.info(f"Updated existing search {search['id']} for user {user_id}")
                 return search['id'], False
-        
+
         # Создаем новый поиск
         search_id = str(uuid.uuid4())
         new_search = {
@@ -134,136 +149,146 @@ def save_search(
             'updated_at': now_iso,
             'last_check': now_iso
         }
-        
-        platform_searches.append(new_search)
-        save_searches(searches)
-        logger.info(f"Saved new search {search_id} for user {user_id} on {platform}")
-        return search_id, True
+        search_repository.add(user_id, platform, new_search)
+
+    logger.info(f"Saved new search {search_id} for user {user_id} on {platform}")
+    return search_id, True
+
+def get_searches_to_check() -> List[dict]:
+    """
+    Все поиски с включёнными уведомлениями для фоновой проверки (без самих результатов):
+    [{'user_id', 'platform', 'id', 'params', 'last_result_ids'}]
+    """
+    search_repository.flush()
+    with db_lock:
+        rows = get_connection().execute(
+            "SELECT id, user_id, platform, params, last_result_ids FROM searches "
+            "WHERE notifications = 1 ORDER BY rowid"
+        ).fetchall()
+    return [
+        {
+            'user_id': row['user_id'],
+            'platform': row['platform'],
+            'id': row['id'],
+            'params': json.loads(row['params']),
+            'last_result_ids': json.loads(row['last_result_ids'])
+        }
+        for row in rows
+    ]
+
+def update_search_results(user_id, search_id: str, ads: List[dict]) -> bool:
+    """
+    Добавляет свежую выдачу к результатам поиска (после фоновой проверки): свежие — в начало, прежние — за ними.
+    Обход останавливается на уже виденной странице, поэтому выдача бывает короче прежних результатов
+    и не должна их заменять, иначе объявления с дальних страниц потом пришли бы как новые.
+    """
+    now_iso = datetime.utcnow().isoformat()
+    results_dict = build_results_dict(ads[:MAX_RESULTS_PER_SEARCH])
+    fresh_urls = {ad.get('url') for ad in results_dict.values()}
+
+    with search_repository.lock:
+        found = search_repository.find(user_id, search_id)
+        if found is None:
+            return False
+        _, search = found
+        for key, ad in search.get('last_results', {}).items():
+            if len(results_dict) >= MAX_RESULTS_PER_SEARCH:
+                break
+            # Старые поиски хранят объявление под ссылкой: то же объявление из свежей выдачи уже есть под ID
+            if key not in results_dict and key not in fresh_urls and ad.get('url') not in fresh_urls:
+                results_dict[key] = ad
+        search['last_result_ids'] = list(results_dict.keys())
+        search['last_results'] = results_dict
+        search['last_check'] = now_iso
+        search['updated_at'] = now_iso
+        search_repository.mark_dirty(user_id, search_id, results=True)
+    return True
     
 def remove_search_by_id(user_id: int, search_id: str) -> bool:
     """Удаляет поиск по ID"""
-    with lock:
-        searches = load_searches()
-        user_searches = searches.get(str(user_id), {})
-        
-        removed = False
-        for platform, platform_searches in user_searches.items():
-            for i, search in enumerate(platform_searches):
-                if search['id'] == search_id:
-                    platform_searches.pop(i)
-                    removed = True
-                    break
-            if removed:
-                if not platform_searches:
-                    user_searches.pop(platform)
-                break
-
-        if removed and not user_searches:
-            searches.pop(str(user_id))
+    removed = search_repository.remove(user_id, search_id)
 
-        if removed:
-            save_searches(searches)
-            logger.info(f"Removed search {search_id} for user {user_id}")
-        else:
-            logger.warning(f"Search {search_id} not found for user {user_id}")
+    if removed:
+        logger.info(f"Removed search {search_id} for user {user_id}")
+    else:
+        logger.warning(f"Search {search_id} not found for user {user_id}")
 
-        return removed
+    return removed
 
 def toggle_notifications(user_id: int, search_id: str) -> Optional[bool]:
     """Переключает уведомления для поиска"""
-    with lock:
-        searches = load_searches()
-        user_searches = searches.get(str(user_id), {})
-        
-        for platform_searches in user_searches.values():
-            for search in platform_searches:
-                if search['id'] == search_id:
-                    search['notifications'] = not search.get('notifications', True)
-                    search['updated_at'] = datetime.utcnow().isoformat()
-                    save_searches(searches)
-                    new_status = search['notifications']
-                    logger.info(f"Toggled notifications for search {search_id} to {new_status}")
-                    return new_status
-        
-        logger.warning(f"Search {search_id} not found for user {user_id}")
-        return None
+    with search_repository.lock:
+        found = search_repository.find(user_id, search_id)
+        if found is None:
+            logger.warning(f"Search {search_id} not found for user {user_id}")
+            return None
+
+        _, search = found
+        search['notifications'] = not search.get('notifications', True)
+        search['updated_at'] = datetime.utcnow().isoformat()
+        search_repository.mark_dirty(user_id, search_id)
+        new_status = search['notifications']
+
+    logger.info(f"Toggled notifications for search {search_id} to {new_status}")
+    return new_status
 
 def cleanup_old_searches(days: int = MAX_SEARCH_AGE_DAYS) -> int:
     """Очищает старые поиски (старше указанного количества дней)"""
-    with lock:
-        searches = load_searches()
-        removed_count = 0
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-
-        for user_id in list(searches.keys()):
-            user_searches = searches[user_id]
-            for platform in list(user_searches.keys()):
-                platform_searches = user_searches[platform]
-                new_list = []
-                for search in platform_searches:
-                    try:
-                        updated_at = datetime.fromisoformat(search.get('updated_at', search['created_at']))
-                    except Exception:
-                        removed_count += 1
-                        continue
-
-                    if updated_at >= cutoff_date:
-                        new_list.append(search)
-                    else:
-                        removed_count += 1
-
-                if new_list:
-                    user_searches[platform] = new_list
-                else:
-                    user_searches.pop(platform)
-
-            if not user_searches:
-                searches.pop(user_id)
-
-        save_searches(searches)
-        logger.info(f"Cleaned up {removed_count} old searches")
-        return removed_count
+    cutoff_date = (datetime.utcnow() - timedelta(days=days)).isoformat()
+
+    search_repository.flush()
+    with transaction() as conn:
+        removed_ids = [row['id'] for row in conn.execute(
+            "DELETE FROM searches WHERE COALESCE(updated_at, created_at) IS NULL "
+            "OR COALESCE(updated_at, created_at) < ? RETURNING id",
+            (cutoff_date,)
+        ).fetchall()]
+    search_repository.forget(removed_ids)
+
+    logger.info(f"Cleaned up {len(removed_ids)} old searches")
+    return len(removed_ids)
 
 def import_user_searches(user_id: int, searches_data: dict) -> int:
     """Импортирует поиски для пользователя"""
-    with lock:
-        current_searches = load_searches()
-        user_searches = current_searches.setdefault(str(user_id), {})
-        imported_count = 0
+    imported_count = 0
+
+    with search_repository.lock:
+        user_searches = search_repository.user(user_id)
 
         for platform, searches in searches_data.items():
-            existing_ids = {s['id'] for s in user_searches.get(platform, [])}
-            
             for search in searches:
-                if search['id'] not in existing_ids:
-                    # Проверяем лимит поисков
-                    total_searches = sum(len(s) for s in user_searches.values())
-                    if total_searches >= MAX_SEARCHES_PER_USER:
-                        break
-                        
-                    user_searches.setdefault(platform, []).append(search)
-                    imported_count += 1
-
-        save_searches(current_searches)
-        logger.info(f"Imported {imported_count} searches for user {user_id}")
-        return imported_count
+                owner = search_repository.owner(search['id'])
+                if owner == str(user_id):
+                    # Этот поиск у пользователя уже есть
+                    continue
+
+                # Проверяем лимит поисков
+                total_searches = sum(len(s) for s in user_searches.values())
+                if total_searches >= MAX_SEARCHES_PER_USER:
+                    break
+
+                if owner is not None:
+                    # ID занят поиском другого пользователя — импортируем под новым ID, чужой поиск не трогаем
+                    search = {**search, 'id': str(uuid.uuid4())}
+                search_repository.add(user_id, platform, search)
+                imported_count += 1
+
+    logger.info(f"Imported {imported_count} searches for user {user_id}")
+    return imported_count
 
 def get_search_results(user_id: int, search_id: str) -> List[dict]:
     """Получает сохраненные результаты поиска"""
-    searches = load_searches()
-    user_searches = searches.get(str(user_id), {})
-    
-    for platform_searches in user_searches.values():
-        for search in platform_searches:
-            if search['id'] == search_id:
-                # Преобразуем словарь обратно в список для совместимости
-                results_dict = search.get('last_results', {})
-                return [
-                    {'id': ad_id, **ad_data} 
-                    for ad_id, ad_data in results_dict.items()
-                ]
-    
-    return []
+    with search_repository.lock:
+        found = search_repository.find(user_id, search_id)
+        if found is None:
+            return []
+
+        # Преобразуем словарь обратно в список для совместимости
+        results_dict = found[1].get('last_results', {})
+        return [
+            {'id': ad_id, **ad_data}
+            for ad_id, ad_data in results_dict.items()
+        ]
 
 def compare_platforms_prices(user_id: int, platform1: str, platform2: str) -> Dict[str, List[dict]]:
     """
@@ -279,8 +304,7 @@ def compare_platforms_prices(user_id: int, platform1: str, platform2: str) -> Di
         "only_second": []
     }
     
-    searches = load_searches()
-    user_searches = searches.get(str(user_id), {})
+    user_searches = get_user_searches(user_id)
     
     # Получаем все результаты для указанных платформ
     platform1_results = []
@@ -288,11 +312,11 @@ def compare_platforms_prices(user_id: int, platform1: str, platform2: str) -> Di
     
     if platform1 in user_searches:
         for search in user_searches[platform1]:
-            platform1_results.extend(search.get('last_results', []))
+            platform1_results.extend(search.get('last_results', {}).values())
     
     if platform2 in user_searches:
         for search in user_searches[platform2]:
-            platform2_results.extend(search.get('last_results', []))
+            platform2_results.extend(search.get('last_results', {}).values())
     
     # Создаем нормализованные ключи для сравнения (марка + модель)
     def create_key(ad):
@@ -340,9 +364,9 @@ def compare_platforms_prices(user_id: int, platform1: str, platform2: str) -> Di
     
     # 3. Автомобили на обеих платформах (сравниваем цены)
     for key in common_keys:
-        # Берем минимальные цены с каждой платформы для сравнения
-        min_price1 = min(ad.get('price', 0) for ad in platform1_ads[key])
-        min_price2 = min(ad.get('price', 0) for ad in platform2_ads[key])
+        # Берем минимальные цены с каждой платформы для сравнения (объявления без цены не учитываем)
+        min_price1 = min((ad['price_value'] for ad in platform1_ads[key] if ad.get('price_value')), default=0)
+        min_price2 = min((ad['price_value'] for ad in platform2_ads[key] if ad.get('price_value')), default=0)
         
         # Пример объявления с каждой платформы
         example_ad1 = platform1_ads[key][0]
@@ -366,31 +390,11 @@ def compare_platforms_prices(user_id: int, platform1: str, platform2: str) -> Di
     
     # Сортируем результаты
     comparison["common"].sort(key=lambda x: abs(x["price_difference"]), reverse=True)
-    comparison["only_first"].sort(key=lambda x: x["ad"].get('price', 0))
-    comparison["only_second"].sort(key=lambda x: x["ad"].get('price', 0))
+    comparison["only_first"].sort(key=lambda x: x["ad"].get('price_value') or 0)
+    comparison["only_second"].sort(key=lambda x: x["ad"].get('price_value') or 0)
     
     return comparison
 
-def clean_price(price_str: str) -> float:
-    """Преобразует строку цены в число"""
-    if not price_str:
-        return 0
-    
-    # Удаляем все символы, кроме цифр и точки/запятой
-    cleaned = re.sub(r'[^\d.,]', '', price_str)
-    
-    # Заменяем запятые на точки для десятичных разделителей
-    cleaned = cleaned.replace(',', '.')
-    
-    try:
-        # Если есть точка - считаем это десятичной дробью
-        if '.' in cleaned:
-            return float(cleaned)
-        # Иначе - целое число
-        return float(cleaned)
-    except ValueError:
-        return 0
-
 def build_platforms_comparison_keyboard(user_id: int) -> InlineKeyboardMarkup:
     """Создает клавиатуру для выбора платформ для сравнения"""
     searches = get_user_searches(user_id)
@@ -434,41 +438,14 @@ def build_search_actions_keyboard(search_id: str) -> InlineKeyboardMarkup:
 
 def delete_search_by_id(user_id: int, search_id: str) -> bool:
     """Удаляет поиск по ID и возвращает True если удаление прошло успешно"""
-    with lock:
-        searches = load_searches()
-        user_id_str = str(user_id)
-        
-        if user_id_str not in searches:
-            return False
-            
-        deleted = False
-        for platform in list(searches[user_id_str].keys()):
-            platform_searches = searches[user_id_str][platform]
-            # Ищем и удаляем поиск
-            searches[user_id_str][platform] = [
-                s for s in platform_searches 
-                if s['id'] != search_id
-            ]
-            
-            # Если удалили что-то, отмечаем
-            if len(searches[user_id_str][platform]) != len(platform_searches):
-                deleted = True
-                
-            # Удаляем пустые платформы
-            if not searches[user_id_str][platform]:
-                del searches[user_id_str][platform]
-        
-        # Удаляем пустых пользователей
-        if not searches[user_id_str]:
-            del searches[user_id_str]
-        
-        if deleted:
-            save_searches(searches)
-            logger.info(f"Deleted search {search_id} for user {user_id}")
-        else:
-            logger.warning(f"Search {search_id} not found for user {user_id}")
+    deleted = search_repository.remove(user_id, search_id)
+
+    if deleted:
+        logger.info(f"Deleted search {search_id} for user {user_id}")
+    else:
+        logger.warning(f"Search {search_id} not found for user {user_id}")
             
-        return deleted
+    return deleted
 
 def build_comparison_keyboard(search_id: str) -> InlineKeyboardMarkup:
     """Создает клавиатуру для выбора второго поиска для сравнения"""
@@ -512,16 +489,10 @@ def build_results_navigation_keyboard(
     return builder.as_markup()
 
 def get_search_info(user_id: int, search_id: str) -> Optional[dict]:
-    """Получает информацию о поиске"""
-    searches = load_searches()
-    user_searches = searches.get(str(user_id), {})
-    
-    for platform_searches in user_searches.values():
-        for search in platform_searches:
-            if search['id'] == search_id:
-                return search
-    
-    return None
+    """Получает информацию о поиске (снимок, как и get_user_searches)"""
+    with search_repository.lock:
+        found = search_repository.find(user_id, search_id)
+        return search_snapshot(found[1]) if found else None
 
 def compare_search_results(search1: dict, search2: dict) -> dict:
     """Сравнивает результаты двух поисков"""
@@ -542,8 +513,7 @@ def compare_prices_by_model(user_id: int, brand: str, model: str) -> Dict[str, A
     """
     Сравнивает цены указанной модели автомобиля на всех платформах
     """
-    searches = load_searches()
-    user_searches = searches.get(str(user_id), {})
+    user_searches = get_user_searches(user_id)
     
     # Нормализуем входные данные для сравнения
     brand_lower = brand.strip().lower()
@@ -581,31 +551,28 @@ def compare_prices_by_model(user_id: int, brand: str, model: str) -> Dict[str, A
                 if (brand_lower in ad_brand and 
                     model_lower in ad_model):
                     
-                    try:
-                        price = float(clean_price(ad.get('price', '0')))
-                        if price > 0:
-                            platform_ads[platform].append({
-                                'price': price,
-                                'url': ad.get('url', ''),
-                                'title': ad.get('title', ''),
-                                'date': ad.get('date', ''),
-                                'location': ad.get('location', '')
-                            })
-                    except (ValueError, TypeError):
-                        continue
+                    price = ad.get('price_value')
+                    if price:
+                        platform_ads[platform].append({
+                            'price': price,
+                            'url': ad.get('url', ''),
+                            'title': ad.get('title', ''),
+                            'date': ad.get('date', ''),
+                            'location': ad.get('address', '')
+                        })
     
     # Анализируем данные по платформам
     for platform, ads in platform_ads.items():
         if not ads:
             continue
             
-        prices = [ad['price'] for ad in ads]
+        prices = sorted(ad['price'] for ad in ads)
         platform_stats = {
             'platform': platform,
-            'min_price': min(prices),
-            'max_price': max(prices),
+            'min_price': prices[0],
+            'max_price': prices[-1],
             'avg_price': sum(prices) / len(prices),
-            'median_price': sorted(prices)[len(prices) // 2],
+            'median_price': prices[len(prices) // 2],
             'count': len(ads),
             'ads': ads[:5]  # Сохраняем 5 объявлений для примера
         }
@@ -621,8 +588,7 @@ def compare_prices_by_model(user_id: int, brand: str, model: str) -> Dict[str, A
     return result
 
 def get_unique_brands_and_models(user_id: int) -> Dict[str, List[str]]:
-    searches = load_searches()
-    user_data = searches.get(str(user_id), {})
+    user_data = get_user_searches(user_id)
     
     brands_models = defaultdict(list)
     
@@ -647,8 +613,7 @@ def get_unique_brands_and_models(user_id: int) -> Dict[str, List[str]]:
 
 def get_ads_by_model(user_id: int, brand: str, model: str, platform: str) -> List[dict]:
     """Возвращает объявления по конкретной модели и платформе"""
-    searches = load_searches()
-    user_searches = searches.get(str(user_id), {}).get(platform, [])
+    user_searches = get_user_searches(user_id).get(platform, [])
     
     ads = []
     
@@ -679,11 +644,10 @@ def get_ads_by_model(user_id: int, brand: str, model: str, platform: str) -> Lis
             if (ad_brand == brand.lower() and 
                 ad_model == model.lower()):
                 
-                cleaned_ad = ad.copy()
-                cleaned_ad['price_num'] = clean_price(ad.get('price', '0'))
-                ads.append(cleaned_ad)
+                ads.append(ad)
     
-    ads.sort(key=lambda x: x['price_num'])
+    # Объявления без цены — в конце
+    ads.sort(key=lambda x: x.get('price_value') or float('inf'))
     return ads
 
 def extract_brand_model(title: str) -> tuple:
@@ -0,0 +1,50 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, TypeVar
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def canonical_url(url: str) -> str:
+    """Ключ для URL выдачи: хост в нижнем регистре, параметры запроса отсортированы, пустые убраны"""
+    parts = urlsplit(url.strip())
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=False))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), ""))
+
+
+class SingleFlight:
+    """
+    Таблица выполняющихся запросов: пока выдача по URL загружается,
+    остальные вызовы с тем же URL ждут её результата, а не запускают свою загрузку.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.started = 0   # Сколько загрузок реально запущено
+        self.joined = 0    # Сколько вызовов дождались чужой загрузки
+
+    async def run(self, key: str, fetch: Callable[[], Awaitable[T]]) -> T:
+        task = self._in_flight.get(key)
+        if task is None:
+            self.started += 1
+            task = asyncio.create_task(fetch())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.joined += 1
+            logger.info(f"Запрос уже выполняется, ждём его результата: {key}")
+        # shield: отмена одного ожидающего не отменяет загрузку для остальных
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {'started': self.started, 'joined': self.joined, 'in_flight': len(self._in_flight)}
+
+
+single_flight = SingleFlight()
@@ -1,5 +1,3 @@
-from typing import List, Dict
-
 locations_dict = {
     "all": 621540,
     "adygeya": 645530,
@@ -9600,24 +9598,3 @@ def find_cities_by_name(name: str) -> list:
         if name_lower in city_name.lower():
             matched.append({"id": city_id, "name": city_name})
     return matched
-
-def find_city_matches(normalized_city: str, locations_dict: dict) -> List[Dict]:
-    """Находит совпадения городов в базе"""
-    matches = []
-    
-    for city_path, city_id in locations_dict.items():
-        parts = city_path.split('_')
-        
-        if normalized_city in parts:
-            match_level = 100 if normalized_city == parts[-1] else 50
-            display_name = parts[-1].title()
-            
-            matches.append({
-                'id': city_id,
-                'path': city_path,
-                'name': display_name,
-                'full_name': " ".join(p.title() for p in parts),
-                'match_level': match_level
-            })
-    
-    return sorted(matches, key=lambda x: (-x['match_level'], x['full_name']))
\ No newline at end of file
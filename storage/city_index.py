@@ -0,0 +1,82 @@
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from storage.cities import locations_dict
+
+
+class CityIndex:
+    """
+    Индексы по locations_dict Avito, строятся один раз при импорте:
+    точное совпадение пути, обратный поиск по id, поиск по слову пути и по префиксу.
+    """
+
+    def __init__(self, locations: Dict[str, int]):
+        self.locations = locations
+        self.path_by_id: Dict[int, str] = {}
+        self.paths_by_token: Dict[str, List[str]] = {}
+        self._order: Dict[str, int] = {}
+        prefix_keys = []
+
+        for order, (path, location_id) in enumerate(locations.items()):
+            self.path_by_id.setdefault(location_id, path)
+            self._order[path] = order
+            parts = path.split('_')
+            for token in set(parts):
+                self.paths_by_token.setdefault(token, []).append(path)
+            # Ключи для префиксного поиска: путь целиком и все его «хвосты» по словам
+            for start in range(len(parts)):
+                prefix_keys.append(('_'.join(parts[start:]), path))
+
+        # Отсортированные пары (ключ, путь) для поиска по префиксу бинарным поиском
+        prefix_keys.sort()
+        self._prefix_keys = [key for key, _ in prefix_keys]
+        self._prefix_paths = [path for _, path in prefix_keys]
+
+    def location_id(self, path: str) -> Optional[int]:
+        """locationId по точному пути"""
+        return self.locations.get(path)
+
+    def path(self, location_id: int) -> Optional[str]:
+        """Путь по locationId"""
+        return self.path_by_id.get(location_id)
+
+    def by_token(self, token: str) -> List[Tuple[str, int]]:
+        """Все (путь, id), у которых одно из слов пути совпадает с token"""
+        return [(path, self.locations[path]) for path in self.paths_by_token.get(token, [])]
+
+    def by_prefix(self, prefix: str) -> List[Tuple[str, int]]:
+        """Все (путь, id), у которых путь начинается с prefix с границы слова, в порядке locations_dict"""
+        if not prefix:
+            return []
+
+        found = set()
+        i = bisect_left(self._prefix_keys, prefix)
+        while i < len(self._prefix_keys) and self._prefix_keys[i].startswith(prefix):
+            found.add(self._prefix_paths[i])
+            i += 1
+
+        return [(path, self.locations[path]) for path in sorted(found, key=self._order.__getitem__)]
+
+
+def find_city_matches(normalized_city: str, index: Optional[CityIndex] = None) -> List[Dict]:
+    """Находит совпадения городов в базе; index — готовый индекс другого словаря, по умолчанию city_index"""
+    index = index or city_index
+    matches = []
+
+    for city_path, city_id in index.by_token(normalized_city):
+        parts = city_path.split('_')
+        match_level = 100 if normalized_city == parts[-1] else 50
+        display_name = parts[-1].title()
+
+        matches.append({
+            'id': city_id,
+            'path': city_path,
+            'name': display_name,
+            'full_name': " ".join(p.title() for p in parts),
+            'match_level': match_level
+        })
+
+    return sorted(matches, key=lambda x: (-x['match_level'], x['full_name']))
+
+
+city_index = CityIndex(locations_dict)
@@ -0,0 +1,51 @@
+import json
+import logging
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Константы
+DROM_CITIES_PATH = "storage/regions_and_cities.json"
+
+
+class DromCity(NamedTuple):
+    name: str
+    region: str
+    link: str
+
+
+@lru_cache(maxsize=None)
+def get_drom_geo_index(file_path: str = DROM_CITIES_PATH) -> Mapping[str, Tuple[DromCity, ...]]:
+    """
+    Индекс городов Drom: название в нижнем регистре -> города с таким названием (с регионом и ссылкой).
+    Файл читается один раз на процесс, индекс неизменяемый.
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            regions = json.load(file)
+    except Exception as e:
+        logger.error(f"Ошибка загрузки данных из {file_path}: {e}")
+        regions = []
+
+    index = {}
+    for region in regions:
+        region_name = region.get('name')
+        for city in region.get('cities', []):
+            entry = DromCity(city['name'], region_name, city['link'])
+            index.setdefault(city['name'].lower(), []).append(entry)
+
+    logger.info(f"Загружен индекс городов Drom: {len(index)} названий")
+    return MappingProxyType({name: tuple(entries) for name, entries in index.items()})
+
+
+def find_drom_cities(city_name: str) -> Tuple[DromCity, ...]:
+    """Все города Drom с таким названием (без учёта регистра)"""
+    return get_drom_geo_index().get(city_name.strip().lower(), ())
+
+
+def find_drom_city(city_name: str) -> Optional[DromCity]:
+    """Первый город Drom с таким названием или None"""
+    matches = find_drom_cities(city_name)
+    return matches[0] if matches else None
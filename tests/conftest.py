@@ -0,0 +1,14 @@
+import pytest
+
+from services import search_db
+from services.search_repository import SearchRepository
+
+
+@pytest.fixture
+def repository(tmp_path, monkeypatch):
+    """Репозиторий поверх отдельной БД во временной папке"""
+    search_db.close_connection()
+    monkeypatch.setattr(search_db, "DB_PATH", tmp_path / "searches.db")
+    monkeypatch.setattr(search_db, "LEGACY_JSON_PATH", tmp_path / "searches.json")
+    yield SearchRepository(flush_delay=0)
+    search_db.close_connection()
@@ -0,0 +1,20 @@
+import pytest
+
+from services.autoru_parser import AutoRuParser
+
+SALE_URL = "https://auto.ru/cars/used/sale/bmw/x5/1123456789-1a2b3c4d"
+
+
+@pytest.mark.parametrize("link, expected", [
+    (SALE_URL + "/", "1123456789-1a2b3c4d"),
+    (SALE_URL, "1123456789-1a2b3c4d"),
+    (SALE_URL + "/?from=searchline", "1123456789-1a2b3c4d"),
+    ("/cars/used/sale/bmw/x5/1123456789-1a2b3c4d/", "1123456789-1a2b3c4d"),
+    ("https://auto.ru/cars/bmw/x5/used/", "https://auto.ru/cars/bmw/x5/used/"),
+])
+def test_listing_id_from_link(link, expected):
+    ad = AutoRuParser()._normalize_listing(
+        {'title': "BMW X5", 'link': link, 'region': "Москва"}
+    )
+
+    assert ad.id == expected
@@ -0,0 +1,31 @@
+import asyncio
+
+from services.background_checker import BackgroundChecker, query_key
+
+CITY_LINK = "https://www.drom.ru/my_region/?go=https%3A%2F%2Fpodolsk.drom.ru%2Fauto%2F"
+DROM_PARAMS = {"brand": "BMW", "region": "Подольск", "radius": 0, "min_price": 0, "max_price": 0,
+               "platform": "drom", "distance": 100, "city_link": CITY_LINK}
+
+
+def test_saved_drom_search_keeps_distance_and_city(monkeypatch):
+    checker = BackgroundChecker(bot=None)
+    calls = []
+
+    async def parse_ads(**kwargs):
+        calls.append(kwargs)
+        return []
+
+    monkeypatch.setattr(checker.drom_parser, "parse_ads", parse_ads)
+
+    asyncio.run(checker._fetch("drom", DROM_PARAMS))
+
+    assert calls[0]['distance'] == 100
+    assert calls[0]['city_link'] == CITY_LINK
+
+
+def test_drom_searches_in_different_cities_are_not_grouped():
+    other_city = {**DROM_PARAMS, "city_link": "https://www.drom.ru/my_region/?go=https%3A%2F%2Fpodolsk-other.drom.ru"}
+    farther = {**DROM_PARAMS, "distance": 200}
+
+    assert query_key("drom", other_city) != query_key("drom", DROM_PARAMS)
+    assert query_key("drom", farther) != query_key("drom", DROM_PARAMS)
@@ -0,0 +1,16 @@
+from storage.city_index import CityIndex, find_city_matches
+
+
+def test_find_city_matches_uses_default_index():
+    matches = find_city_matches("moskva")
+
+    assert matches[0]['path'] == "moskva"
+    assert matches[0]['match_level'] == 100
+
+
+def test_find_city_matches_uses_given_index():
+    index = CityIndex({"sverdlovskaya_oblast_ekaterinburg": 1, "ekaterinburg_rayon": 2, "tver": 3})
+
+    matches = find_city_matches("ekaterinburg", index)
+
+    assert [(match['id'], match['match_level']) for match in matches] == [(1, 100), (2, 50)]
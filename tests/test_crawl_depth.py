@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from config.settings import settings
+from services import avito_parser, drom_parser
+from services.background_checker import BackgroundChecker
+
+
+@pytest.fixture
+def crawled(monkeypatch):
+    """Подменяет обход выдачи: запоминает, сколько страниц у него попросили"""
+    calls = []
+
+    async def fake_crawl_pages(fetch_page, key, max_pages, concurrency, known=()):
+        calls.append(max_pages)
+        return []
+
+    monkeypatch.setattr(avito_parser, "crawl_pages", fake_crawl_pages)
+    monkeypatch.setattr(drom_parser, "crawl_pages", fake_crawl_pages)
+    return calls
+
+
+@pytest.fixture
+def checker(monkeypatch):
+    checker = BackgroundChecker(bot=None)
+
+    async def avito_url(*args, **kwargs):
+        return "https://www.avito.ru/moskva/avtomobili/bmw?radius=0"
+
+    monkeypatch.setattr(checker.avito_parser, "generate_url", avito_url)
+    monkeypatch.setattr(checker.drom_parser, "generate_url",
+                        lambda *args, **kwargs: "https://moscow.drom.ru/bmw/all/")
+    return checker
+
+
+@pytest.mark.parametrize("platform", ["avito", "drom"])
+def test_saved_pages_reach_crawl(checker, crawled, platform):
+    params = {"brand": "BMW", "region": "Москва", "radius": 0,
+              "min_price": 0, "max_price": 0, "platform": platform, "pages": 5}
+
+    asyncio.run(checker._fetch(platform, params))
+
+    assert crawled == [5]
+
+
+@pytest.mark.parametrize("platform", ["avito", "drom"])
+def test_search_without_pages_uses_default_depth(checker, crawled, platform):
+    params = {"brand": "BMW", "region": "Москва", "platform": platform}
+
+    asyncio.run(checker._fetch(platform, params))
+
+    assert crawled == [settings.CRAWL_MAX_PAGES[platform]]
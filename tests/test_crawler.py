@@ -0,0 +1,42 @@
+import asyncio
+
+from services.crawler import crawl_pages
+
+
+def make_fetch(pages):
+    """Выдача из заранее заданных страниц; в fetched — номера загруженных"""
+    fetched = []
+
+    async def fetch_page(number):
+        fetched.append(number)
+        return pages.get(number, [])
+
+    return fetch_page, fetched
+
+
+def crawl(pages, known=()):
+    fetch_page, fetched = make_fetch(pages)
+    ads = asyncio.run(crawl_pages(fetch_page, key=lambda ad: ad, max_pages=5, concurrency=1, known=known))
+    return ads, fetched
+
+
+def test_stops_on_page_without_ads_new_to_the_crawl():
+    ads, fetched = crawl({1: ["a", "b"], 2: ["b"], 3: ["c"]})
+
+    assert ads == ["a", "b"]
+    assert fetched == [1, 2]
+
+
+def test_stops_on_page_with_only_previously_seen_ads():
+    ads, fetched = crawl({1: ["new", "a"], 2: ["b", "c"], 3: ["d"]}, known={"a", "b", "c", "d"})
+
+    # Виденная страница остаётся в выдаче, дальше обход не идёт
+    assert ads == ["new", "a", "b", "c"]
+    assert fetched == [1, 2]
+
+
+def test_nothing_new_on_first_page_reads_only_first_page():
+    ads, fetched = crawl({1: ["a", "b"], 2: ["c"]}, known={"a", "b"})
+
+    assert ads == ["a", "b"]
+    assert fetched == [1]
@@ -0,0 +1,39 @@
+from services import page_fingerprint
+from services.page_fingerprint import PageFingerprints
+
+URL = "https://www.avito.ru/moskva/avtomobili/bmw"
+HTML = '<div data-item-id="101"></div><meta itemprop="price" content="1500000">'
+
+
+def counting_parser():
+    calls = []
+
+    def parse(html):
+        calls.append(html)
+        return [f"разбор {len(calls)}"]
+
+    return parse, calls
+
+
+def test_unchanged_page_is_not_parsed_again():
+    fingerprints = PageFingerprints()
+    parse, calls = counting_parser()
+
+    first = fingerprints.parse("avito", URL, HTML, parse)
+    second = fingerprints.parse("avito", URL, HTML, parse)
+
+    assert second == first
+    assert len(calls) == 1
+
+
+def test_unchanged_page_is_parsed_again_after_max_age(monkeypatch):
+    fingerprints = PageFingerprints(max_age=60)
+    parse, calls = counting_parser()
+    now = [1000.0]
+    monkeypatch.setattr(page_fingerprint.time, "monotonic", lambda: now[0])
+
+    fingerprints.parse("avito", URL, HTML, parse)
+    now[0] += 61
+    # Даты в прежнем разборе устарели: страница разбирается заново, хоть и не изменилась
+    assert fingerprints.parse("avito", URL, HTML, parse) == ["разбор 2"]
+    assert len(calls) == 2
@@ -0,0 +1,23 @@
+from pathlib import Path
+
+import pytest
+
+from services.avito_parser import AvitoParser
+from services.drom_parser import DromParser
+from services.html_backend import available_backends
+
+FIXTURES_DIR = Path(__file__).parent.parent / "benchmarks" / "fixtures"
+
+
+@pytest.mark.parametrize("platform, parser_class", [("avito", AvitoParser), ("drom", DromParser)])
+def test_backends_extract_the_same_listings(platform, parser_class):
+    html = (FIXTURES_DIR / platform / "sample.html").read_text(encoding="utf-8")
+    parser = parser_class()
+
+    baseline = parser._parse_html(html, backend="html.parser", only=None)
+    assert baseline
+    # Объявления «вчера» и старше отсеиваются фильтром свежести
+    assert all(ad.date != "вчера" for ad in baseline)
+
+    for backend in available_backends():
+        assert parser._parse_html(html, backend=backend) == baseline
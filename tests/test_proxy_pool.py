@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from services import proxy_pool as proxy_pool_module
+from services.errors import BlockedError
+from services.proxy_pool import ProxyPool
+
+CONFIG = {"ewma_alpha": 1.0, "initial_latency": 1.0, "ban_seconds": 60, "ban_seconds_max": 600}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Ручные часы: ожидание у ограничителя занимает 5 с"""
+    now = [100.0]
+
+    async def slow_wait(url, via=None):
+        now[0] += 5
+
+    monkeypatch.setattr(proxy_pool_module.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(proxy_pool_module.rate_limiter, "wait", slow_wait)
+    return now
+
+
+def test_latency_excludes_rate_limit_wait(clock):
+    pool = ProxyPool(urls=[], use_direct=True, config=CONFIG)
+
+    async def request():
+        async with pool.use("avito", "https://www.avito.ru/moskva") as proxy:
+            clock[0] += 0.5
+        return proxy
+
+    proxy = asyncio.run(request())
+
+    assert proxy.health_for("avito").latency == pytest.approx(0.5)
+
+
+def block(pool, proxy_name):
+    """Запрос, на который площадка ответила баном"""
+    async def request():
+        with pytest.raises(BlockedError):
+            async with pool.use("avito") as proxy:
+                assert proxy.name == proxy_name
+                raise BlockedError("avito", "HTTP 403")
+
+    asyncio.run(request())
+
+
+def test_last_exit_is_never_banned(clock):
+    pool = ProxyPool(urls=[], use_direct=True, config=CONFIG)
+
+    block(pool, "direct")
+
+    assert pool.available("avito")
+    assert pool.proxies[0].health_for("avito").bans == 0
+
+
+def test_ban_length_resets_after_success(clock):
+    pool = ProxyPool(urls=["http://proxy:8080"], use_direct=True, config=CONFIG)
+    direct, proxy = pool.proxies
+    proxy.health_for("avito").success_rate = 0.1  # Первым выбирается прямой выход
+    health = direct.health_for("avito")
+
+    block(pool, "direct")
+    assert health.banned_until == pytest.approx(clock[0] + 60)
+
+    clock[0] += 61
+    health.record_success(1.0)
+    block(pool, "direct")
+    # Успех между банами: срок не удваивается
+    assert health.banned_until == pytest.approx(clock[0] + 60)
+    assert health.bans == 2
@@ -0,0 +1,53 @@
+import pytest
+
+from services import search_db
+from services.search_repository import SearchRepository
+
+
+def make_search(search_id: str, brand: str) -> dict:
+    return {
+        'id': search_id,
+        'params': {'brand': brand},
+        'last_result_ids': [],
+        'last_results': {},
+        'notifications': True
+    }
+
+
+def test_add_refuses_id_of_another_user(repository):
+    repository.add(1, "avito", make_search("shared", "BMW"))
+
+    with pytest.raises(ValueError):
+        repository.add(2, "avito", make_search("shared", "Lada"))
+
+    platform, search = repository.find(1, "shared")
+    assert (platform, search['params']) == ("avito", {'brand': 'BMW'})
+    assert repository.find(2, "shared") is None
+
+
+def test_add_refuses_id_of_user_not_loaded_yet(repository):
+    repository.add(1, "avito", make_search("shared", "BMW"))
+    repository.flush()
+
+    # Новый процесс: в кэше никого, владелец известен только БД
+    fresh = SearchRepository(flush_delay=0)
+    with pytest.raises(ValueError):
+        fresh.add(2, "drom", make_search("shared", "Lada"))
+
+    assert fresh.find(1, "shared")[1]['params'] == {'brand': 'BMW'}
+
+
+def test_fetch_results_splits_large_id_lists(repository, monkeypatch):
+    monkeypatch.setattr(search_db, "QUERY_CHUNK_SIZE", 2)
+    for number in range(5):
+        search = make_search(f"s{number}", "BMW")
+        search['last_results'] = {f"ad{number}": {'id': f"ad{number}", 'price_value': None}}
+        repository.add(1, "avito", search)
+    repository.flush()
+
+    with search_db.db_lock:
+        results = search_db.fetch_results(search_db.get_connection(), [f"s{number}" for number in range(5)])
+
+    assert {search_id: list(ads) for search_id, ads in results.items()} == {
+        f"s{number}": [f"ad{number}"] for number in range(5)
+    }
@@ -0,0 +1,49 @@
+import pytest
+
+from services import search_service
+
+
+@pytest.fixture
+def service(repository, monkeypatch):
+    monkeypatch.setattr(search_service, "search_repository", repository)
+    return search_service
+
+
+def make_ad(ad_id: str) -> dict:
+    return {'id': ad_id, 'title': f"BMW X5 {ad_id}", 'price': "1 000 000 ₽",
+            'url': f"https://www.avito.ru/moskva/avtomobili/{ad_id}"}
+
+
+def test_update_keeps_results_from_pages_the_crawl_did_not_reach(service, repository):
+    search_id, _ = service.save_search(1, "avito", {'brand': "BMW"}, [], [make_ad(i) for i in ("a", "b", "c")])
+
+    # Обход остановился на первой странице: «b» и «c» остались на дальних
+    assert service.update_search_results(1, search_id, [make_ad("new"), make_ad("a")])
+
+    _, search = repository.find(1, search_id)
+    assert search['last_result_ids'] == ["new", "a", "b", "c"]
+    assert list(search['last_results']) == ["new", "a", "b", "c"]
+
+
+def test_update_replaces_results_stored_under_url(service, repository):
+    ad = make_ad("a")
+    search_id, _ = service.save_search(1, "avito", {'brand': "BMW"}, [], [{**ad, 'id': None}])
+
+    service.update_search_results(1, search_id, [ad])
+
+    _, search = repository.find(1, search_id)
+    assert search['last_result_ids'] == ["a"]
+
+
+def test_snapshots_do_not_follow_later_updates(service):
+    search_id, _ = service.save_search(1, "avito", {'brand': "BMW"}, [], [make_ad("a")])
+    info = service.get_search_info(1, search_id)
+    searches = service.get_user_searches(1)
+
+    service.update_search_results(1, search_id, [make_ad("new")])
+    service.toggle_notifications(1, search_id)
+
+    assert info['last_result_ids'] == ["a"]
+    assert info['notifications'] is True
+    assert searches["avito"][0]['last_result_ids'] == ["a"]
+    assert service.get_search_info(1, search_id)['last_result_ids'] == ["new", "a"]